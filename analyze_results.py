@@ -0,0 +1,218 @@
+"""Offline analytics over the results archive.
+
+``ingest`` streams per-game JSON files out of a directory or a tarball,
+parses them in a process pool and appends them to a columnar Arrow/Feather
+snapshot (only files not already in the snapshot are parsed). ``report``
+memory-maps the snapshot and prints win rates per class, per team and
+over time. ``backfill`` loads the snapshot into a local results database.
+
+    python analyze_results.py ingest results/
+    python analyze_results.py ingest results-2025-07-05.tar.gz
+    python analyze_results.py report --participants participant.csv --freq 15min
+    python analyze_results.py backfill --data-dir event-box/
+"""
+import argparse
+import json
+import os
+import tarfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from leaderboard import normalize
+
+SNAPSHOT_PATH = os.path.join(".cache", "results.feather")
+BATCH_SIZE = 256
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("team_code", pa.string()),
+    ("timestamp", pa.timestamp("us")),
+    ("win", pa.int8()),
+    ("rounds", pa.int16()),
+    ("ai_wins", pa.int16()),
+    ("player_wins", pa.int16()),
+    ("draws", pa.int16()),
+    ("game", pa.string()),
+    ("data", pa.string()),
+])
+
+
+# --- Streaming the archive ---
+def iter_archive(source, skip=frozenset()):
+    """Yield ``(record id, raw bytes)`` for every result file in a directory or tarball."""
+    if os.path.isdir(source):
+        for entry in sorted(os.scandir(source), key=lambda e: e.name):
+            record_id = entry.name[:-len(".json")]
+            if entry.is_file() and entry.name.endswith(".json") and record_id not in skip:
+                with open(entry.path, "rb") as f:
+                    yield record_id, f.read()
+        return
+    # "r|*" reads the tarball as a stream, so it is never unpacked or held in memory
+    with tarfile.open(source, "r|*") as tar:
+        for member in tar:
+            name = os.path.basename(member.name)
+            record_id = name[:-len(".json")]
+            if member.isfile() and name.endswith(".json") and record_id not in skip:
+                yield record_id, tar.extractfile(member).read()
+
+
+def batches(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- Parsing (runs in worker processes) ---
+def parse_batch(batch):
+    rows = {name: [] for name in SCHEMA.names}
+    for record_id, raw in batch:
+        try:
+            record = json.loads(raw)
+            win = int(record.get("win", 0))
+        except (ValueError, TypeError):
+            # Unparseable, or a win that is null or not a number: one bad record must not sink the batch
+            continue
+        results = (record.get("aggregates") or {}).get("results", {})
+        rows["id"].append(record_id)
+        rows["team_code"].append(str(record.get("team_code", "")))
+        rows["timestamp"].append(record.get("timestamp"))
+        rows["win"].append(win)
+        rows["rounds"].append((record.get("aggregates") or {}).get("rounds"))
+        rows["ai_wins"].append(results.get("AI"))
+        rows["player_wins"].append(results.get("Player"))
+        rows["draws"].append(results.get("Draw"))
+        rows["game"].append(record.get("game"))
+        rows["data"].append(raw.decode("utf-8"))
+    rows["timestamp"] = pd.to_datetime(pd.Series(rows["timestamp"], dtype=object), format="ISO8601", errors="coerce")
+    return pa.table(rows, schema=SCHEMA)
+
+
+def parse_archive(source, skip=frozenset(), workers=None):
+    """Parsed batches in archive order, with at most ``2 * workers`` batches in flight at a time."""
+    workers = workers or os.cpu_count() or 1
+    # Submitting everything at once (pool.map) would read and queue the whole archive up front
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for batch in batches(iter_archive(source, skip=skip)):
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+            in_flight.append(pool.submit(parse_batch, batch))
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+# --- Snapshot ---
+def read_snapshot(path=SNAPSHOT_PATH):
+    """The snapshot as an Arrow table, memory-mapped rather than read into memory."""
+    if not os.path.exists(path):
+        return SCHEMA.empty_table()
+    return feather.read_table(path, memory_map=True)
+
+
+def ingest(source, path=SNAPSHOT_PATH, workers=None):
+    existing = read_snapshot(path)
+    known = frozenset(existing.column("id").to_pylist())
+    parsed = [t for t in parse_archive(source, skip=known, workers=workers) if t.num_rows]
+    if not parsed:
+        return 0, existing.num_rows
+    table = pa.concat_tables([existing, *parsed]).sort_by([("timestamp", "ascending"), ("id", "ascending")])
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Uncompressed Feather so later runs can memory-map it without decoding
+    feather.write_feather(table, f"{path}.tmp", compression="uncompressed")
+    os.replace(f"{path}.tmp", path)
+    return sum(t.num_rows for t in parsed), table.num_rows
+
+
+# --- Reports ---
+def win_rates(df, by):
+    # "win" is summed as leaderboard points and a few archived games carry more than 1
+    grouped = df.assign(won=df["win"] > 0).groupby(by, observed=True).agg(
+        games=("won", "size"), wins=("won", "sum"), points=("win", "sum")
+    )
+    grouped["win_rate"] = grouped["wins"] / grouped["games"]
+    return grouped.sort_values(["win_rate", "games"], ascending=False)
+
+
+def report(path=SNAPSHOT_PATH, participants=None, freq="1h"):
+    table = read_snapshot(path).select(["id", "team_code", "timestamp", "win"])
+    df = table.to_pandas()
+    if df.empty:
+        return {}
+    df["team_code"] = normalize(df["team_code"])
+    reports = {"team": win_rates(df, "team_code")}
+    if participants:
+        part = pd.read_csv(participants, encoding="utf-8-sig")
+        class_of = pd.Series(normalize(part["Class"]).values, index=normalize(part["team_code"])).groupby(level=0).first()
+        df["Class"] = df["team_code"].map(class_of).fillna("(unknown)")
+        reports["class"] = win_rates(df, "Class")
+    over_time = (df["win"] > 0).set_axis(df["timestamp"]).loc[df["timestamp"].notna().values]
+    over_time = over_time.resample(freq).agg(["size", "sum"])
+    over_time.columns = ["games", "wins"]
+    over_time = over_time[over_time["games"] > 0]
+    over_time["win_rate"] = over_time["wins"] / over_time["games"]
+    reports["over_time"] = over_time
+    return reports
+
+
+def backfill(data_dir, path=SNAPSHOT_PATH):
+    from storage import LocalBackend
+
+    table = read_snapshot(path).select(["id", "data"])
+    records = [dict(json.loads(data), id=record_id)
+               for record_id, data in zip(table.column("id").to_pylist(), table.column("data").to_pylist())]
+    return LocalBackend(data_dir).import_records(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot and analyze the results archive.")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH, help="Feather snapshot to read/update")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_cmd = commands.add_parser("ingest", help="add new result files to the snapshot")
+    ingest_cmd.add_argument("source", help="results directory or .tar/.tar.gz archive")
+    ingest_cmd.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+
+    report_cmd = commands.add_parser("report", help="win rates per team, class and over time")
+    report_cmd.add_argument("--participants", default=None, help="participant.csv for the per-class table")
+    report_cmd.add_argument("--freq", default="1h", help="time bucket for the trend, e.g. 15min, 1h, 1D")
+    report_cmd.add_argument("--top", type=int, default=20, help="rows per table")
+    report_cmd.add_argument("--out", default=None, help="also write each table as CSV into this directory")
+    report_cmd.add_argument("--parquet", default=None, help="also export the snapshot as Parquet")
+
+    backfill_cmd = commands.add_parser("backfill", help="load the snapshot into a local results.db")
+    backfill_cmd.add_argument("--data-dir", default=".", help="LocalBackend directory")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        added, total = ingest(args.source, args.snapshot, args.workers)
+        print(f"Added {added} results; {args.snapshot} now holds {total}")
+    elif args.command == "report":
+        reports = report(args.snapshot, args.participants, args.freq)
+        if not reports:
+            print(f"No results in {args.snapshot}; run `ingest` first")
+            return
+        for name, table in reports.items():
+            print(f"\n## Win rate {'over time' if name == 'over_time' else f'by {name}'}")
+            print(table.head(args.top).to_string(float_format=lambda v: f"{v:.3f}"))
+            if args.out:
+                os.makedirs(args.out, exist_ok=True)
+                table.to_csv(os.path.join(args.out, f"win_rate_by_{name}.csv"))
+        if args.parquet:
+            pq.write_table(read_snapshot(args.snapshot), args.parquet)
+    else:
+        print(f"Imported {backfill(args.data_dir, args.snapshot)} new results into {args.data_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,239 +1,194 @@
 import streamlit as st
-import random
+import os
 import time
-from collections import defaultdict, Counter
-import json
 from datetime import datetime
 import requests
-import base64
-import uuid
+
+import events
+import metrics
+import storage
+from result_queue import JOURNAL_PATH, ResultQueue
+from game_codec import encode_game, to_text
+from game_stats import GameAggregates
+from rps_ai import determine_winner, make_ai
+from move_limiter import MoveLimiter
+from session_store import SessionStore
+from team_registry import TeamRegistry
+
+run_started = time.perf_counter()
+metrics.serve_from_env()
 
 # --- Label Map ---
 label_full = {'R': '✊ Rock', 'P': '✋ Paper', 'S': '✌️ Scissors'}
 
-# @st.cache_data(ttl=60)
+# --- Event: ?event=<key> selects one of the [events] in secrets (see events.py) ---
+try:
+    event = events.get_event(st.secrets, st.query_params.get("event"))
+except events.EventNotFound:
+    event = None
+
+# --- Storage backend (GitHub by default, local directory + SQLite for LAN events) ---
+# Shared by every event (and app) that writes to the same repo or directory
+@st.cache_resource
+def get_storage(event_key):
+    return events.get_backend(events.get_event(st.secrets, event_key))
+
+# --- Write-behind queue: results are journaled locally and uploaded in the background ---
+@st.cache_resource
+def get_result_queue(event_key):
+    journal = events.get_event(st.secrets, event_key).cache_path("result_journal.db", JOURNAL_PATH)
+    return ResultQueue(get_storage(event_key), path=journal)
+
 def is_team_code_used(team_code):
-    github_username = st.secrets['github']['username']
-    github_repo = st.secrets['github']['repo']
-    github_token = st.secrets['github']['token']
-    folder_path = st.secrets['github']['folder']
-
-    url = f"https://api.github.com/repos/{github_username}/{github_repo}/contents/{folder_path}"
-    headers = {"Authorization": f"Bearer {github_token}"}
-    response = requests.get(url, headers=headers)
-
-    if response.status_code == 200:
-        files = response.json()
-        for file in files:
-            if file["name"].startswith(f"{team_code}_") and file["name"].endswith(".json"):
-                return True
-        return False
-    else:
+    # A finished game still waiting in the journal counts as played
+    if get_result_queue(event.key).has_team(team_code):
+        return True
+    # Set/index lookup; the GitHub backend revalidates with conditional requests on a miss
+    try:
+        return get_storage(event.key).is_team_code_used(team_code)
+    except (requests.RequestException, storage.StorageError):
         st.error("❌ Could not verify previous submissions.")
         return False
 
-# --- Load valid team codes from GitHub CSV ---
-@st.cache_data(ttl=60)
-def load_team_codes():
-    github_username = st.secrets['github']['username']
-    github_repo = st.secrets['github']['repo']
-    github_token = st.secrets['github']['token']
-    file_path = "team_code.csv"
-
-    url = f"https://raw.githubusercontent.com/{github_username}/{github_repo}/main/{file_path}"
-    headers = {"Authorization": f"Bearer {github_token}"}
-    response = requests.get(url, headers=headers)
-
-    if response.status_code == 200:
-        codes = response.text.strip().splitlines()
-        return [c.strip() for c in codes if c.strip()]
-    else:
+# --- Valid team codes: shared by all sessions, refreshed in the background ---
+@st.cache_resource
+def get_team_registry(event_key):
+    return TeamRegistry(get_storage(event_key))
+
+def lookup_team_code(team_code):
+    """(code as listed, Class) for a valid code, (None, None) otherwise."""
+    registry = get_team_registry(event.key)
+    try:
+        return registry.canonical(team_code), registry.class_of(team_code)
+    except (OSError, requests.RequestException, storage.StorageError):
         st.error("🚫 Unable to load team codes - please seek for advice.")
-        return []
+        return None, None
 
 
-# save the result to github
-def save_result_to_github():
+# queue the result; the id doubles as the idempotency key for retries
+def save_result():
     result_data = {
+        "id": storage.new_result_id(st.session_state.team_code),
         "team_code": st.session_state.team_code,
         "timestamp": datetime.now().isoformat(),
-        "win": 1 if st.session_state.stats['Player'] > st.session_state.stats['AI'] else 0
+        "win": 1 if st.session_state.aggregates.results['Player'] > st.session_state.aggregates.results['AI'] else 0,
+        "aggregates": st.session_state.aggregates.to_dict()
     }
-    json_content = json.dumps(result_data, indent=2)
-    encoded = base64.b64encode(json_content.encode()).decode()
-
-    unique_id = uuid.uuid4().hex
-    filename = f"{st.session_state.team_code}_{unique_id}.json"
-    filepath = f"{st.secrets['github']['folder']}/{filename}"
-    url = f"https://api.github.com/repos/{st.secrets['github']['username']}/{st.secrets['github']['repo']}/contents/{filepath}"
-
-    headers = {
-        "Authorization": f"Bearer {st.secrets['github']['token']}",
-        "Accept": "application/vnd.github+json"
-    }
-
-    payload = {
-        "message": f"Save result for team {st.session_state.team_code}",
-        "content": encoded
-    }
-
-    put_resp = requests.put(url, headers=headers, json=payload)
-
-    if put_resp.status_code in [200, 201]:
-        return f"https://github.com/{st.secrets['github']['username']}/{st.secrets['github']['repo']}/blob/main/{filepath}"
-    else:
-        raise Exception(f"GitHub upload failed: {put_resp.status_code} — {put_resp.text}")
+    # [results] full_game = false in secrets keeps records to the summary only
+    if st.secrets.get("results", {}).get("full_game", True):
+        history = st.session_state.history
+        result_data["game"] = to_text(encode_game(
+            [h['Player'] for h in history], [h['AI'] for h in history], [h['Latency'] for h in history]
+        ))
+    return get_result_queue(event.key).enqueue(result_data)
+
+
+# --- Server-side game sessions, so a reconnect resumes mid-game ---
+GAME_STATE_KEYS = [
+    'round', 'ai', 'aggregates', 'history', 'game_over', 'last_result', 'last_ai_move', 'last_player_move',
+    'team_code', 'result_logged', 'timer_start', 'last_move_at'
+]
+
+@st.cache_resource
+def get_session_store(event_key):
+    settings = st.secrets.get("sessions", {})
+    persist_path = os.environ.get("RPS_SESSION_DB", settings.get("persist_path"))
+    if persist_path:
+        # Team codes can repeat across events, so each event keeps its own sessions
+        persist_path = events.get_event(st.secrets, event_key).cache_path(os.path.basename(persist_path), persist_path)
+    return SessionStore(ttl=settings.get("ttl", 900), persist_path=persist_path)
+
+def save_game_session():
+    get_session_store(event.key).put(st.session_state.team_code, {k: st.session_state[k] for k in GAME_STATE_KEYS})
+
+def resume_game_session(team_code):
+    state = get_session_store(event.key).get(team_code)
+    if state is None or state.get("result_logged"):
+        return False
+    for key, value in state.items():
+        st.session_state[key] = value
+    return True
 
 
 # --- Session Initialization ---
 if "initialized" not in st.session_state:
     st.session_state.round = 1
     st.session_state.ai = None
-    st.session_state.stats = {'AI': 0, 'Player': 0, 'Draw': 0}
+    st.session_state.aggregates = GameAggregates()
     st.session_state.history = []
     st.session_state.game_over = False
     st.session_state.last_result = None
     st.session_state.last_ai_move = None
     st.session_state.last_player_move = None
-    st.session_state.player_streak = 0
-    st.session_state.ai_streak = 0
-    st.session_state.max_player_streak = 0
-    st.session_state.max_ai_streak = 0
     st.session_state.team_name = ""
     st.session_state.team_code = ""
     st.session_state.result_logged = False
     st.session_state.timer_start = None
+    st.session_state.last_move_at = None
+    st.session_state.move_rejected = None
     st.session_state.initialized = True
 
 # --- Countdown Clock ---
-if st.session_state.timer_start is not None:
-    remaining_time = max(0, 60 - int(time.time() - st.session_state.timer_start))
-    if remaining_time == 0:
-        st.session_state.game_over = True
-else:
-    remaining_time = 60
-
-# --- AI Class ---
-class RPS_AI:
-    def __init__(self):
-        self.reset()
-
-    def reset(self):
-        self.move_counts = {'R': 1, 'P': 1, 'S': 1}
-        self.last_player_moves = []
-        self.learning_rate = 0.2
-        self.pattern_memory = defaultdict(list)
-        self.transition_counts = defaultdict(lambda: {'R': 1, 'P': 1, 'S': 1})
-        self.move_sequences = defaultdict(int)
-
-    def get_move(self):
-        base_randomness = max(0.05, 0.2 - (st.session_state.round * 0.005))
-        if random.random() < base_randomness:
-            return random.choice(['R', 'P', 'S'])
-        predicted_move = self._predict_player_move()
-        return self._counter_move(predicted_move)
-
-    def _predict_player_move(self):
-        moves = self.last_player_moves
-        if len(moves) >= 4:
-            if moves[-4:-1] == moves[-3:]:
-                return moves[-1]
-            sequence = tuple(moves[-4:])
-            if sequence in self.move_sequences:
-                return self.move_sequences[sequence]
-        if len(moves) >= 3:
-            if moves[-1] == moves[-2] == moves[-3]:
-                return moves[-1]
-            common_sequences = {
-                ('R', 'P', 'S'): 'R',
-                ('P', 'S', 'R'): 'P',
-                ('S', 'R', 'P'): 'S'
-            }
-            last_three = tuple(moves[-3:])
-            if last_three in common_sequences:
-                return common_sequences[last_three]
-        if len(moves) >= 1:
-            last_move = moves[-1]
-            probs = self.transition_counts[last_move]
-            total = sum(probs.values())
-            rand = random.uniform(0, total)
-            cumulative = 0
-            for move, count in probs.items():
-                cumulative += count
-                if rand <= cumulative:
-                    return move
-        total = sum(self.move_counts.values())
-        rand = random.uniform(0, total)
-        cumulative = 0
-        for move, count in self.move_counts.items():
-            cumulative += count
-            if rand <= cumulative:
-                return move
-        return random.choice(['R', 'P', 'S'])
-
-    def _counter_move(self, predicted_move):
-        if random.random() < 0.15:
-            return random.choice(['R', 'P', 'S'])
-        return {'R': 'P', 'P': 'S', 'S': 'R'}[predicted_move]
-
-    def update(self, player_move, result):
-        self.move_counts[player_move] += 1
-        self.last_player_moves.append(player_move)
-        if len(self.last_player_moves) > 10:
-            self.last_player_moves.pop(0)
-        if len(self.last_player_moves) >= 2:
-            prev = self.last_player_moves[-2]
-            curr = self.last_player_moves[-1]
-            self.transition_counts[prev][curr] += 1
-        if len(self.last_player_moves) >= 4:
-            sequence = tuple(self.last_player_moves[-4:-1])
-            self.move_sequences[sequence] = self.last_player_moves[-1]
-        if result == 'AI':
-            self.learning_rate = min(0.3, self.learning_rate + 0.02)
-        else:
-            self.learning_rate = max(0.1, self.learning_rate - 0.01)
+GAME_SECONDS = 60
 
-# --- Helpers ---
-def determine_winner(ai_move, player_move):
-    if ai_move == player_move:
-        return 'Draw'
-    if (ai_move == 'R' and player_move == 'S') or \
-       (ai_move == 'P' and player_move == 'R') or \
-       (ai_move == 'S' and player_move == 'P'):
-        return 'AI'
-    return 'Player'
+def time_remaining():
+    if st.session_state.timer_start is None:
+        return GAME_SECONDS
+    return max(0, GAME_SECONDS - int(time.time() - st.session_state.timer_start))
+
+remaining_time = time_remaining()
+if st.session_state.timer_start is not None and remaining_time == 0:
+    st.session_state.game_over = True
+
+# --- Move throttle: one token bucket per team, shared by all of its sessions ---
+@st.cache_resource
+def get_move_limiter():
+    # [moves] rate (moves per second) and burst in secrets
+    settings = st.secrets.get("moves", {})
+    return MoveLimiter(rate=settings.get("rate", 5.0), burst=settings.get("burst", 5))
 
+# --- Helpers ---
 def is_game_over():
-    return st.session_state.game_over or sum(st.session_state.stats.values()) >= 60
-
-def update_streaks(result):
-    if result == 'Player':
-        st.session_state.player_streak += 1
-        st.session_state.ai_streak = 0
-        st.session_state.max_player_streak = max(st.session_state.max_player_streak, st.session_state.player_streak)
-    elif result == 'AI':
-        st.session_state.ai_streak += 1
-        st.session_state.player_streak = 0
-        st.session_state.max_ai_streak = max(st.session_state.max_ai_streak, st.session_state.ai_streak)
-    else:
-        st.session_state.player_streak = 0
-        st.session_state.ai_streak = 0
+    return st.session_state.game_over or st.session_state.aggregates.rounds >= 60
 
+# Runs as the buttons' on_click callback, i.e. before the page is rendered, so a
+# rejected move costs a dictionary lookup instead of AI work and a second rerun
 def play_round(player_move):
-    if st.session_state.get("ai") is None:
-        st.session_state.ai = RPS_AI()
-    if is_game_over():
+    st.session_state.move_rejected = None
+    if is_game_over() or st.session_state.timer_start is None:
+        metrics.count("moves_rejected_total", reason="over")
+        return
+    # The deadline is enforced here, not just by the on-screen countdown
+    if time_remaining() == 0:
+        st.session_state.game_over = True
+        metrics.count("moves_rejected_total", reason="late")
+        return
+    if not get_move_limiter().allow(f"{event.key}:{st.session_state.team_code}"):
+        st.session_state.move_rejected = "⏳ Too fast! Wait a moment before your next move."
         return
-    ai_move = st.session_state.ai.get_move()
+    if st.session_state.get("ai") is None:
+        # [ai] mode = "heuristic" (default) or "context_mixing" in secrets
+        st.session_state.ai = make_ai(st.secrets.get("ai", {}).get("mode", "heuristic"))
+    now = time.time()
+    # Response time since the previous move (or since the game started)
+    latency_ms = (now - (st.session_state.last_move_at or st.session_state.timer_start or now)) * 1000
+    st.session_state.last_move_at = now
+    with metrics.timed("ai_seconds", op="get_move"):
+        ai_move = st.session_state.ai.get_move(st.session_state.round)
     result = determine_winner(ai_move, player_move)
-    st.session_state.ai.update(player_move, result)
-    st.session_state.stats[result] += 1
-    update_streaks(result)
+    with metrics.timed("ai_seconds", op="update"):
+        st.session_state.ai.update(player_move, result)
+    metrics.count("moves_total")
+    # Counts, streaks, transitions and windowed win rates, all updated in one place
+    st.session_state.aggregates.update(player_move, result)
     st.session_state.history.append({
         'Round': st.session_state.round,
         'Player': player_move,
         'AI': ai_move,
-        'Result': result
+        'Result': result,
+        'Latency': round(latency_ms),
+        # Server time of the move, in ms since the game started
+        'At': round((now - st.session_state.timer_start) * 1000)
     })
     st.session_state.last_result = result
     st.session_state.last_ai_move = ai_move
@@ -241,12 +196,20 @@ def play_round(player_move):
     st.session_state.round += 1
     if is_game_over():
         st.session_state.game_over = True
+    save_game_session()
 
 # --- UI ---
 st.set_page_config(page_title="RPS Challenge", layout="centered")
-st.title("🎮 Rock-Paper-Scissors Challenge")
+if event is None:
+    st.error(f"❌ Unknown event: {st.query_params.get('event')}")
+    st.stop()
+st.title(f"🎮 {event.title} Rock-Paper-Scissors Challenge" if event.isolated else "🎮 Rock-Paper-Scissors Challenge")
 st.caption("60 rounds against an adaptive AI that learns your patterns. Can you outsmart it?")
 
+if st.query_params.get("debug") == "metrics":
+    metrics.debug_view()
+    st.stop()
+
 
 # --- Team Info Form ---
 #if "team_code" not in st.session_state or not st.session_state.team_code:
@@ -265,22 +228,31 @@ st.caption("60 rounds against an adaptive AI that learns your patterns. Can you
 
 # --- Team Info Form with GitHub Validation ---
 if "team_code" not in st.session_state or not st.session_state.team_code:
-    allowed_codes = load_team_codes()
+    # A reload/reconnect keeps ?team=... in the URL; pick the game up where it was
+    if st.query_params.get("team") and resume_game_session(st.query_params["team"]):
+        st.rerun()
 
     with st.form("team_info"):
         team_code = st.text_input("Enter Team Code")
         submitted = st.form_submit_button("Start Game")
 
         if submitted:
-            team_code = team_code.strip()
-            if team_code in allowed_codes:
-                if is_team_code_used(team_code):
+            # Case and surrounding spaces don't matter; the code is recorded as listed
+            team_code, team_class = lookup_team_code(team_code)
+            if team_code:
+                if resume_game_session(team_code):
+                    st.query_params["team"] = team_code
+                    st.success("▶️ Resuming your game...")
+                    st.rerun()
+                elif is_team_code_used(team_code):
                     st.error("🚫 This team has already played. You are not allowed to play again.")
                     st.stop()
                 else:
                     st.session_state.team_code = team_code
                     st.session_state.timer_start = time.time()
-                    st.success("✅ Valid team code. Starting the game...")
+                    save_game_session()
+                    st.query_params["team"] = team_code
+                    st.success(f"✅ Valid team code{f' for {team_class}' if team_class else ''}. Starting the game...")
                     st.rerun()
             else:
                 st.error("❌ Invalid team code. You are not authorized to play.")
@@ -290,10 +262,21 @@ if "team_code" not in st.session_state or not st.session_state.team_code:
 
 
 # --- Timer Display ---
-if st.session_state.timer_start is not None:
+# Only this fragment re-runs every second; the rest of the page redraws on moves
+@st.experimental_fragment(run_every=1)
+def countdown():
+    remaining = time_remaining()
+    st.markdown(f"### ⏱️ Time Remaining: **{remaining} seconds**")
+    if remaining == 0 and not st.session_state.game_over:
+        st.session_state.game_over = True
+        st.rerun()  # full rerun to disable the buttons and save the result
+
+if st.session_state.timer_start is None:
+    st.info("⌛ Waiting for game to start...")
+elif is_game_over():
     st.markdown(f"### ⏱️ Time Remaining: **{remaining_time} seconds**")
 else:
-    st.info("⌛ Waiting for game to start...")
+    countdown()
 
 # --- Progress Bar ---
 progress_value = min(st.session_state.round / 60, 1.0)
@@ -303,20 +286,20 @@ st.progress(progress_value, text=f"Round {min(st.session_state.round, 60)}/60")
 st.write("### Make your move:")
 cols = st.columns(3)
 with cols[0]:
-    if st.button("✊ Rock", key='R', disabled=is_game_over(), use_container_width=True):
-        play_round('R')
+    st.button("✊ Rock", key='R', disabled=is_game_over(), use_container_width=True, on_click=play_round, args=('R',))
 with cols[1]:
-    if st.button("✋ Paper", key='P', disabled=is_game_over(), use_container_width=True):
-        play_round('P')
+    st.button("✋ Paper", key='P', disabled=is_game_over(), use_container_width=True, on_click=play_round, args=('P',))
 with cols[2]:
-    if st.button("✌️ Scissors", key='S', disabled=is_game_over(), use_container_width=True):
-        play_round('S')
+    st.button("✌️ Scissors", key='S', disabled=is_game_over(), use_container_width=True, on_click=play_round, args=('S',))
+if st.session_state.get("move_rejected"):
+    st.warning(st.session_state.move_rejected)
 
 # --- Score Display ---
+aggregates = st.session_state.aggregates
 col1, col2, col3 = st.columns(3)
-col1.metric("🤖 Computer Wins", st.session_state.stats['AI'], f"Max streak: {st.session_state.max_ai_streak}")
-col2.metric("👤 Your Wins", st.session_state.stats['Player'], f"Max streak: {st.session_state.max_player_streak}")
-col3.metric("🤝 Draws", st.session_state.stats['Draw'])
+col1.metric("🤖 Computer Wins", aggregates.results['AI'], f"Max streak: {aggregates.max_ai_streak}")
+col2.metric("👤 Your Wins", aggregates.results['Player'], f"Max streak: {aggregates.max_player_streak}")
+col3.metric("🤝 Draws", aggregates.results['Draw'])
 
 # --- Last Result ---
 if st.session_state.last_result and not is_game_over():
@@ -334,20 +317,17 @@ if st.session_state.last_result and not is_game_over():
         st.error("AI won this round!")
 
 # --- Stats Summary ---
-if st.session_state.history:
+if aggregates.rounds:
     st.write("## Move Statistics")
-    all_player_moves = [x['Player'] for x in st.session_state.history]
-    player_move_counts = Counter(all_player_moves)
     for move in ['R', 'P', 'S']:
-        count = player_move_counts.get(move, 0)
-        st.write(f"{label_full[move]}: {count} times ({count / len(all_player_moves) * 100:.1f}%)")
+        st.write(f"{label_full[move]}: {aggregates.moves[move]} times ({aggregates.move_share(move) * 100:.1f}%)")
 
 # --- Game Over ---
 if is_game_over():
     st.balloons()
     st.success("### 🏁 Game Over!")
-    player_wins = st.session_state.stats['Player']
-    ai_wins = st.session_state.stats['AI']
+    player_wins = aggregates.results['Player']
+    ai_wins = aggregates.results['AI']
     if player_wins > ai_wins:
         st.success(f"## 🎉 You won {player_wins}-{ai_wins}!")
     elif ai_wins > player_wins:
@@ -359,22 +339,12 @@ if is_game_over():
 if is_game_over() and not st.session_state.result_logged:
     st.session_state.result_logged = True
     try:
-        file_url = save_result_to_github()
-        st.session_state.saved_file_url = file_url
+        st.session_state.result_id = save_result()
+        metrics.count("games_finished_total")
+        get_session_store(event.key).discard(st.session_state.team_code)
         st.success("✅ Result saved - Thanks.")
     except Exception as e:
         st.error("❌ Could not save, please seek advise .")
         st.write(str(e))
 
-# --- Auto Refresh Logic (Safe) ---
-# Only auto-rerun when game is still ongoing
-if (
-    "timer_start" in st.session_state and
-    st.session_state.timer_start is not None and
-    remaining_time > 0 and
-    not st.session_state.game_over and
-    not st.session_state.result_logged  # ✅ Don't rerun after logging
-):
-    time.sleep(1)
-    st.rerun()
-
+metrics.observe("script_run_seconds", time.perf_counter() - run_started, app="game")
@@ -0,0 +1,361 @@
+"""Scaling benchmarks for the AI, the leaderboard build and the storage paths.
+
+Every case runs on synthetic data (10² to 10⁶ results, 10 to 1000 classes,
+long move histories) and GitHub is replaced by the in-memory stub from
+``loadtest.py``, so runs are reproducible and never touch the network. Each
+case reports the best wall time of ``--repeat`` runs and the peak memory
+allocated while it ran (from ``tracemalloc``, measured in a separate run).
+
+    python benchmark.py                      # small sizes, a few seconds
+    python benchmark.py --scale full         # up to 10⁶ results / 1000 classes
+    python benchmark.py --only leaderboard --repeat 5
+
+Results are appended to ``.cache/benchmarks.jsonl`` with the git commit, and
+every case is compared with the last recorded run of the same case, so a
+scaling regression shows up as a ratio next to its timing. ``--check`` exits
+with status 1 when any case got slower than ``--threshold``.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from game_codec import encode_game, to_text
+from game_stats import GameAggregates
+from leaderboard import TeamLeaderboard
+from rps_ai import AI_MODES, MOVES, determine_winner, make_ai
+from storage import GitHubBackend, LocalBackend, apply_score_deltas
+
+HISTORY_PATH = os.path.join(".cache", "benchmarks.jsonl")
+TEAMS_PER_CLASS = 20
+GAME_POOL = 200
+SCALES = {
+    "small": {"results": [100, 1_000, 10_000], "classes": [10, 100], "moves": [60, 1_000]},
+    "full": {"results": [100, 1_000, 10_000, 100_000, 1_000_000], "classes": [10, 100, 1_000],
+             "moves": [60, 1_000, 10_000]},
+}
+# Every result is a separate file (and request) through the stub, so the GitHub case stops here
+MAX_GITHUB_RESULTS = 10_000
+NEW_RESULTS = 10
+
+
+# --- Synthetic data ---
+def make_participants(n_classes):
+    return pd.DataFrame(
+        [(f"team{c:04d}{t:02d}", f"Class {c:04d}") for c in range(n_classes) for t in range(TEAMS_PER_CLASS)],
+        columns=["team_code", "Class"]
+    )
+
+
+def make_scores(n_classes, rng):
+    return pd.DataFrame(
+        [[f"CLASS {c:04d}"] + [rng.randint(0, 12) for _ in range(5)] for c in range(n_classes)],
+        columns=["Class", "game2", "game3", "game4", "game5", "game6"]
+    )
+
+
+def make_game(rng, rounds=60):
+    aggregates = GameAggregates()
+    players, ais = [], []
+    for _ in range(rounds):
+        player, ai = rng.choice(MOVES), rng.choice(MOVES)
+        aggregates.update(player, determine_winner(ai, player))
+        players.append(player)
+        ais.append(ai)
+    latencies = [rng.uniform(200, 3000) for _ in range(rounds)]
+    return aggregates.to_dict(), to_text(encode_game(players, ais, latencies))
+
+
+def make_records(n, team_codes, rng):
+    """Result records shaped like the ones app.py saves (aggregates and packed game included)."""
+    # Generating 10⁶ distinct games would dominate the run; a pool keeps the shapes realistic
+    games = [make_game(rng) for _ in range(min(n, GAME_POOL))]
+    start = datetime(2025, 7, 5, 3, 0)
+    records = []
+    for i in range(n):
+        team_code = rng.choice(team_codes)
+        aggregates, game = games[i % len(games)]
+        records.append({
+            "id": f"{team_code}_{i:032x}",
+            "team_code": team_code,
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "win": int(aggregates["results"]["Player"] > aggregates["results"]["AI"]),
+            "aggregates": aggregates,
+            "game": game,
+        })
+    return records
+
+
+def make_moves(n, rng):
+    # A biased, partly cyclic player so the AI's rules actually fire
+    cycle = rng.sample(MOVES, 3)
+    return [cycle[i % 3] if rng.random() < 0.6 else rng.choice(MOVES) for i in range(n)]
+
+
+class Fixtures:
+    """Generated inputs, memoized per size so every case and repeat sees the same data."""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self._cache = {}
+
+    def _get(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build(random.Random(f"{self.seed}:{key}"))
+        return self._cache[key]
+
+    def participants(self, n_classes):
+        return self._get(("participants", n_classes), lambda rng: make_participants(n_classes))
+
+    def scores(self, n_classes):
+        return self._get(("scores", n_classes), lambda rng: make_scores(n_classes, rng))
+
+    def records(self, n, n_classes):
+        codes = list(self.participants(n_classes)["team_code"])
+        return self._get(("records", n, n_classes), lambda rng: make_records(n, codes, rng))
+
+    def moves(self, n):
+        return self._get(("moves", n), lambda rng: make_moves(n, rng))
+
+
+def fresh(df):
+    # frame_version caches its hash in attrs; a copy without it is what a new load looks like
+    df = df.copy(deep=False)
+    df.attrs = {}
+    return df
+
+
+# --- Cases ---
+# Each case yields (name, params, ops, prepare, run): prepare() builds untimed state, run(state) is timed
+def ai_cases(fx, scale):
+    for mode in AI_MODES:
+        for n in scale["moves"]:
+            def prepare(n=n, mode=mode):
+                return make_ai(mode, rng=random.Random(fx.seed)), fx.moves(n)
+
+            def run(state):
+                ai, moves = state
+                for round_no, move in enumerate(moves, 1):
+                    ai_move = ai.get_move(round_no)
+                    ai.update(move, determine_winner(ai_move, move))
+
+            yield "ai_game", {"mode": mode, "moves": n}, n, prepare, run
+
+
+def leaderboard_cases(fx, scale):
+    for n_classes in scale["classes"]:
+        for n in scale["results"]:
+            def frames(n=n, n_classes=n_classes):
+                return (pd.DataFrame(fx.records(n, n_classes)), fx.participants(n_classes), fx.scores(n_classes))
+
+            def prepare_cold(frames=frames):
+                rps, part, scores = frames()
+                return TeamLeaderboard(), fresh(rps), fresh(part), fresh(scores)
+
+            def prepare_new_results(frames=frames):
+                rps, part, scores = frames()
+                board = TeamLeaderboard()
+                board.build(fresh(rps.iloc[:-NEW_RESULTS]), part, scores)
+                return board, fresh(rps), part, scores
+
+            def run(state):
+                board, rps, part, scores = state
+                board.build(rps, part, scores)
+
+            params = {"results": n, "classes": n_classes}
+            yield "leaderboard_build_cold", params, 1, prepare_cold, run
+            yield "leaderboard_build_new_results", dict(params, new=NEW_RESULTS), 1, prepare_new_results, run
+
+
+def score_merge_cases(fx, scale):
+    for n_classes in scale["classes"]:
+        def prepare(n_classes=n_classes):
+            rng = random.Random(fx.seed)
+            scores = fx.scores(n_classes)
+            # One judge filling in a whole game column, plus a class that is not in the file yet
+            deltas = {(c, "game4"): rng.randint(0, 12) for c in scores["Class"]}
+            deltas[("NEW CLASS", "game2")] = 3
+            return scores, deltas
+
+        def run(state):
+            apply_score_deltas(*state)
+
+        yield "apply_score_deltas", {"classes": n_classes}, 1, prepare, run
+
+
+def storage_cases(fx, scale):
+    from github_client import get_client
+    from loadtest import STUB_REPO, STUB_USER, GitHubStub
+
+    n_classes = scale["classes"][0]
+    for n in [n for n in scale["results"] if n <= MAX_GITHUB_RESULTS]:
+        def prepare_github(n=n):
+            files = {f"results/{r['id']}.json": json.dumps({k: v for k, v in r.items() if k != "id"}).encode()
+                     for r in fx.records(n, n_classes)}
+            tmp = tempfile.mkdtemp(prefix="rps-bench-")
+            client = get_client()
+            client.session = GitHubStub(files)
+            client._etags.clear()
+            backend = GitHubBackend(STUB_USER, STUB_REPO, "token")
+            backend.results_cache.path = os.path.join(tmp, "results_cache.json")
+            backend.results_cache.entries = {}
+            return backend, tmp
+
+        def run_github(state):
+            state[0].load_results()
+
+        yield "github_load_results_cold", {"results": n}, n, prepare_github, run_github
+
+    for n in scale["results"]:
+        def prepare_local(n=n):
+            tmp = tempfile.mkdtemp(prefix="rps-bench-")
+            backend = LocalBackend(tmp)
+            backend.import_records(fx.records(n, n_classes))
+            return backend, tmp
+
+        def run_load(state):
+            state[0].load_results()
+
+        def run_save(state):
+            for record in fx.records(NEW_RESULTS, n_classes):
+                state[0].save_result(dict(record, id=f"new_{record['id']}"))
+
+        yield "local_load_results", {"results": n}, n, prepare_local, run_load
+        yield "local_save_result", {"results": n}, NEW_RESULTS, prepare_local, run_save
+
+
+SUITES = {"ai": ai_cases, "leaderboard": leaderboard_cases, "score_merge": score_merge_cases,
+          "storage": storage_cases}
+
+
+# --- Measuring ---
+def cleanup(state):
+    # Storage cases hand back (backend, temp dir)
+    if isinstance(state, tuple) and len(state) == 2 and isinstance(state[1], str) and os.path.isdir(state[1]):
+        shutil.rmtree(state[1], ignore_errors=True)
+
+
+def measure(prepare, run, repeat):
+    times = []
+    for _ in range(repeat):
+        state = prepare()
+        gc.collect()
+        started = timeit.default_timer()
+        run(state)
+        times.append(timeit.default_timer() - started)
+        cleanup(state)
+    # Memory in its own run: tracemalloc slows allocation-heavy code down
+    state = prepare()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        cleanup(state)
+    return min(times), peak
+
+
+def case_key(name, params):
+    return name + "".join(f" {k}={v}" for k, v in sorted(params.items()))
+
+
+def load_previous(path):
+    """The most recent recorded result for every case."""
+    previous = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    for case in json.loads(line)["cases"]:
+                        previous[case_key(case["name"], case["params"])] = case
+    except (OSError, ValueError):
+        pass
+    return previous
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the RPS apps.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--only", action="append", choices=sorted(SUITES), help="run only these suites")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON Lines file the results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="compare but do not record this run")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 on any regression")
+    args = parser.parse_args()
+
+    fx = Fixtures(args.seed)
+    previous = load_previous(args.history)
+    cases, regressions = [], []
+    print(f"{'case':<64} {'best':>9} {'per op':>9} {'peak':>9}  vs last")
+    for suite in args.only or SUITES:
+        for name, params, ops, prepare, run in SUITES[suite](fx, SCALES[args.scale]):
+            seconds, peak = measure(prepare, run, args.repeat)
+            key = case_key(name, params)
+            case = {"name": name, "params": params, "seconds": seconds, "per_op": seconds / ops, "peak_bytes": peak}
+            cases.append(case)
+
+            last = previous.get(key)
+            ratio = seconds / last["seconds"] if last and last["seconds"] else None
+            flag = ""
+            if ratio is not None:
+                flag = f"{ratio:.2f}x"
+                if ratio > args.threshold:
+                    flag += "  ⚠️ slower"
+                    regressions.append(key)
+            print(f"{key:<64} {format_seconds(seconds):>9} {format_seconds(seconds / ops):>9} "
+                  f"{peak / 2**20:>7.1f}MB  {flag}", flush=True)
+
+    if not args.no_save:
+        directory = os.path.dirname(args.history)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "scale": args.scale,
+                "seed": args.seed,
+                "cases": cases,
+            }) + "\n")
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than {args.threshold}x the last run:")
+        for key in regressions:
+            print(f"  {key}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
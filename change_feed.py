@@ -0,0 +1,77 @@
+"""Background change detection for the shared datasets.
+
+One thread per process polls ``backend.dataset_version`` for each dataset
+(conditional requests on GitHub, file stats / a row count locally) and
+bumps a per-dataset version counter when the fingerprint changes. Cached
+loaders take that counter as an argument, so only the dataset that changed
+is reloaded, and viewers compare counters to decide whether to re-render.
+"""
+import threading
+
+import metrics
+from storage import DATASETS
+
+POLL_SECONDS = 10
+
+
+class ChangeFeed:
+    def __init__(self, backend, interval=POLL_SECONDS, datasets=DATASETS, start=True):
+        self.backend = backend
+        self.interval = interval
+        self.datasets = tuple(datasets)
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._fingerprints = {}
+        self._versions = dict.fromkeys(self.datasets, 0)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        self.poll()
+        if start:
+            self.start()
+
+    def versions(self):
+        with self._lock:
+            return dict(self._versions)
+
+    def poll(self):
+        """Check every dataset once; returns the names whose version was bumped."""
+        with self._poll_lock:
+            return self._poll()
+
+    def _poll(self):
+        changed = []
+        for dataset in self.datasets:
+            try:
+                with metrics.timed("change_feed_poll_seconds", dataset=dataset):
+                    fingerprint = self.backend.dataset_version(dataset)
+            except Exception:
+                # Keep the last known version; the next poll tries again
+                metrics.count("change_feed_errors_total", dataset=dataset)
+                continue
+            with self._lock:
+                if dataset in self._fingerprints and self._fingerprints[dataset] != fingerprint:
+                    self._versions[dataset] += 1
+                    changed.append(dataset)
+                    metrics.count("change_feed_updates_total", dataset=dataset)
+                self._fingerprints[dataset] = fingerprint
+        return changed
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.interval)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.poll()
+
+    def start(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="change-feed", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
@@ -0,0 +1,141 @@
+"""Event-scoped configuration, so one deployment can host several events.
+
+Each ``[events.<key>]`` table in secrets describes one event::
+
+    [events]
+    default = "sunway"
+
+    [events.sunway]
+    title = "MATRIX"
+    games = { game2 = "Dodgeball", game3 = "Captain Ball", game1 = "Rock-Paper-Scissors" }
+    github = { repo = "sunway" }            # layered over the top-level [github]
+
+    [events.lan-bracket]
+    storage = { backend = "local", path = "events/lan-bracket" }
+
+``games`` maps score columns to display names in leaderboard order;
+``game1`` is the Rock-Paper-Scissors column filled from game results, every
+other column is entered in the score app. The apps pick the event with
+``?event=<key>`` and fall back to ``[events] default`` (or the first one).
+Without an ``[events]`` section there is a single event with the settings
+the apps always had.
+
+Storage backends are shared process-wide per data location: events (and
+apps) that point at the same repo or directory reuse one backend and its
+caches, and all of them go through the one pooled GitHub client. The
+downloaded-results cache is kept per location, and the result journal and
+saved game sessions per event under ``.cache/<key>/``.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+
+import storage
+from leaderboard import RPS_COL
+
+DEFAULT_EVENT = "default"
+DEFAULT_TITLE = "MATRIX"
+DEFAULT_GAMES = {
+    "game2": "Dodgeball",
+    "game3": "Captain Ball",
+    "game4": "Graph Theoretical",
+    "game5": "Topological",
+    "game6": "Logic & Recreation",
+    RPS_COL: "Rock-Paper-Scissors"
+}
+DEFAULT_GITHUB = {"username": "limfw", "repo": "sunway"}
+CACHE_DIR = ".cache"
+
+
+class EventNotFound(KeyError):
+    pass
+
+
+def _plain(value):
+    # st.secrets hands out read-only mappings; events are built from plain dicts
+    if isinstance(value, Mapping):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+class EventConfig:
+    def __init__(self, key, title=DEFAULT_TITLE, games=None, storage_settings=None, github=None, isolated=False):
+        self.key = key
+        self.title = title
+        self.games = dict(games or DEFAULT_GAMES)
+        self.storage_settings = dict(storage_settings or {})
+        self.github = dict(github or {})
+        # The implicit single event keeps the old cache paths (and their RPS_* env overrides)
+        self.isolated = isolated
+
+    @property
+    def score_cols(self):
+        return list(self.games)
+
+    @property
+    def manual_games(self):
+        """The games judges enter in the score app (everything but Rock-Paper-Scissors)."""
+        return {col: name for col, name in self.games.items() if col != RPS_COL}
+
+    def cache_path(self, name, default):
+        return os.path.join(CACHE_DIR, self.key, name) if self.isolated else default
+
+    def secrets(self):
+        """The ``[storage]``/``[github]`` sections ``storage.from_config`` expects for this event."""
+        return {"storage": dict(self.storage_settings), "github": dict(self.github)}
+
+
+def load_events(secrets):
+    """Every configured event by key, in the order they appear in secrets."""
+    base_storage = _plain(secrets.get("storage", {}))
+    base_github = {**DEFAULT_GITHUB, **_plain(secrets.get("github", {}))}
+    section = _plain(secrets.get("events", {}))
+    tables = {key: value for key, value in section.items() if isinstance(value, dict)}
+    if not tables:
+        return {DEFAULT_EVENT: EventConfig(DEFAULT_EVENT, storage_settings=base_storage, github=base_github)}
+    return {
+        key: EventConfig(
+            key,
+            title=table.get("title", key),
+            games=table.get("games"),
+            storage_settings={**base_storage, **table.get("storage", {})},
+            github={**base_github, **table.get("github", {})},
+            isolated=True
+        )
+        for key, table in tables.items()
+    }
+
+
+def default_event_key(secrets):
+    events = load_events(secrets)
+    return _plain(secrets.get("events", {})).get("default") or next(iter(events))
+
+
+def get_event(secrets, key=None):
+    events = load_events(secrets)
+    key = key or default_event_key(secrets)
+    if key not in events:
+        raise EventNotFound(key)
+    return events[key]
+
+
+# --- Backends shared across events and apps in this process ---
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(event):
+    settings = event.secrets()
+    # Same data location (and credentials) -> same backend, so its caches and indexes are built once
+    location = json.dumps(settings, sort_keys=True, default=str)
+    with _backends_lock:
+        backend = _backends.get(location)
+        if backend is None:
+            if event.isolated:
+                # The downloaded-results cache belongs to the location, not to one event
+                digest = hashlib.sha1(location.encode()).hexdigest()[:12]
+                settings["github"].setdefault("cache_path", os.path.join(CACHE_DIR, digest, "results_cache.json"))
+            backend = _backends[location] = storage.from_config(settings, use_env=not event.isolated)
+        return backend
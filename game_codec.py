@@ -0,0 +1,121 @@
+"""Compact binary encoding of a full game (moves, AI moves, response latency).
+
+Layout of one encoded game::
+
+    byte 0      format version, high bit set when latencies are present
+    byte 1      number of rounds n (<= 255)
+    n/2 bytes   one nibble per round, (player << 2) | ai, R=0 P=1 S=2
+    n bytes     latency per round, log-scaled: code = round(16 * log2(ms + 1))
+
+Results are not stored; they follow from the two moves. A 60-round game is
+32 bytes without latencies and 92 with them (~124 characters of base64 in
+the JSON record). ``decode_games`` turns thousands of games into NumPy
+arrays in one pass for offline analysis and AI training.
+"""
+import base64
+import math
+
+import numpy as np
+
+from rps_ai import MOVE_INDEX, MOVES, determine_winner
+
+FORMAT_VERSION = 1
+HAS_LATENCY = 0x80
+MAX_ROUNDS = 255
+LATENCY_SCALE = 16
+RESULTS = ('AI', 'Player', 'Draw')
+
+# RESULT_TABLE[ai, player] -> index into RESULTS
+RESULT_TABLE = np.array(
+    [[RESULTS.index(determine_winner(a, p)) for p in MOVES] for a in MOVES], dtype=np.int8
+)
+
+
+def _latency_code(ms):
+    return min(255, round(LATENCY_SCALE * math.log2(max(0.0, ms) + 1)))
+
+
+def _header_size(rounds):
+    return 2 + (rounds + 1) // 2
+
+
+# --- One game ---
+def encode_game(players, ais, latencies_ms=None):
+    rounds = len(players)
+    if rounds != len(ais) or rounds > MAX_ROUNDS:
+        raise ValueError(f"cannot encode a game of {rounds} player / {len(ais)} AI moves")
+    flags = HAS_LATENCY if latencies_ms is not None else 0
+    out = bytearray([FORMAT_VERSION | flags, rounds])
+    nibbles = [(MOVE_INDEX[p] << 2) | MOVE_INDEX[a] for p, a in zip(players, ais)]
+    if rounds % 2:
+        nibbles.append(0)
+    out += bytes((nibbles[i] << 4) | nibbles[i + 1] for i in range(0, len(nibbles), 2))
+    if latencies_ms is not None:
+        out += bytes(_latency_code(ms) for ms in latencies_ms)
+    return bytes(out)
+
+
+def decode_game(blob):
+    """Inverse of ``encode_game``: (players, ais, latencies_ms or None)."""
+    flags, rounds = blob[0], blob[1]
+    players, ais = [], []
+    for i in range(rounds):
+        byte = blob[2 + i // 2]
+        nibble = byte >> 4 if i % 2 == 0 else byte & 0x0F
+        players.append(MOVES[nibble >> 2])
+        ais.append(MOVES[nibble & 0x03])
+    latencies = None
+    if flags & HAS_LATENCY:
+        start = _header_size(rounds)
+        latencies = [2 ** (code / LATENCY_SCALE) - 1 for code in blob[start:start + rounds]]
+    return "".join(players), "".join(ais), latencies
+
+
+def to_text(blob):
+    return base64.b64encode(blob).decode("ascii")
+
+
+def from_text(text):
+    return base64.b64decode(text)
+
+
+# --- Many games at once ---
+def decode_games(blobs):
+    """Decode many games into padded arrays.
+
+    Returns a dict of ``players``, ``ais``, ``results`` (int8, -1 past the end
+    of a game), ``latency_ms`` (float32, NaN when missing) and ``rounds``.
+    Games of the same length and format are decoded together as one
+    ``uint8`` matrix, so the cost is a handful of NumPy calls per group.
+    """
+    blobs = [from_text(b) if isinstance(b, str) else bytes(b) for b in blobs]
+    count = len(blobs)
+    rounds = np.array([b[1] for b in blobs], dtype=np.int32)
+    width = int(rounds.max()) if count else 0
+    players = np.full((count, width), -1, dtype=np.int8)
+    ais = np.full((count, width), -1, dtype=np.int8)
+    latency = np.full((count, width), np.nan, dtype=np.float32)
+
+    groups = {}
+    for i, b in enumerate(blobs):
+        groups.setdefault((b[0], b[1]), []).append(i)
+    for (flags, n), rows in groups.items():
+        if n == 0:
+            continue
+        size = _header_size(n) + (n if flags & HAS_LATENCY else 0)
+        data = np.frombuffer(b"".join(blobs[i][:size] for i in rows), dtype=np.uint8).reshape(len(rows), size)
+        packed = data[:, 2:_header_size(n)]
+        nibbles = np.empty((len(rows), packed.shape[1] * 2), dtype=np.uint8)
+        nibbles[:, 0::2] = packed >> 4
+        nibbles[:, 1::2] = packed & 0x0F
+        nibbles = nibbles[:, :n]
+        players[rows, :n] = nibbles >> 2
+        ais[rows, :n] = nibbles & 0x03
+        if flags & HAS_LATENCY:
+            codes = data[:, _header_size(n):].astype(np.float32)
+            latency[rows, :n] = np.exp2(codes / LATENCY_SCALE) - 1
+
+    results = np.full((count, width), -1, dtype=np.int8)
+    played = players >= 0
+    results[played] = RESULT_TABLE[ais[played], players[played]]
+    return {"players": players, "ais": ais, "results": results, "latency_ms": latency, "rounds": rounds}
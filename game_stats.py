@@ -0,0 +1,69 @@
+"""Running per-game aggregates, updated once per round and read in O(1) by the UI.
+
+The same numbers are attached to the saved result (``to_dict``) so the
+leaderboard and offline analysis get per-game detail without replaying
+the round history.
+"""
+MOVES = ('R', 'P', 'S')
+RESULTS = ('AI', 'Player', 'Draw')
+WINDOW = 10
+
+
+class GameAggregates:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.rounds = 0
+        self.moves = dict.fromkeys(MOVES, 0)
+        self.results = dict.fromkeys(RESULTS, 0)
+        # transitions[a][b]: times the player followed move a with move b
+        self.transitions = {a: dict.fromkeys(MOVES, 0) for a in MOVES}
+        self.player_streak = 0
+        self.ai_streak = 0
+        self.max_player_streak = 0
+        self.max_ai_streak = 0
+        # [ai_wins, rounds] per window of ``window`` rounds
+        self.windows = []
+        self.last_move = None
+
+    def update(self, player_move, result):
+        self.rounds += 1
+        self.moves[player_move] += 1
+        self.results[result] += 1
+        if self.last_move is not None:
+            self.transitions[self.last_move][player_move] += 1
+        self.last_move = player_move
+
+        if result == 'Player':
+            self.player_streak += 1
+            self.ai_streak = 0
+            self.max_player_streak = max(self.max_player_streak, self.player_streak)
+        elif result == 'AI':
+            self.ai_streak += 1
+            self.player_streak = 0
+            self.max_ai_streak = max(self.max_ai_streak, self.ai_streak)
+        else:
+            self.player_streak = 0
+            self.ai_streak = 0
+
+        if (self.rounds - 1) % self.window == 0:
+            self.windows.append([0, 0])
+        self.windows[-1][0] += result == 'AI'
+        self.windows[-1][1] += 1
+
+    def move_share(self, move):
+        return self.moves[move] / self.rounds if self.rounds else 0.0
+
+    def ai_win_rates(self):
+        return [wins / rounds for wins, rounds in self.windows]
+
+    def to_dict(self):
+        return {
+            "rounds": self.rounds,
+            "moves": dict(self.moves),
+            "results": dict(self.results),
+            "max_player_streak": self.max_player_streak,
+            "max_ai_streak": self.max_ai_streak,
+            "transitions": [[self.transitions[a][b] for b in MOVES] for a in MOVES],
+            "window": self.window,
+            "ai_win_rate_by_window": [round(r, 3) for r in self.ai_win_rates()],
+        }
@@ -0,0 +1,157 @@
+"""Shared HTTP client for every GitHub call made by the three apps.
+
+One pooled ``requests.Session`` per process, with:
+
+- a default (connect, read) timeout on every call,
+- jittered exponential retry on 429/5xx and connection errors, honouring ``Retry-After``,
+- rate-limit awareness from the ``X-RateLimit-*`` headers,
+- an ETag cache: repeated GETs send ``If-None-Match`` and a 304 is answered from
+  the cached response (``resp.not_modified`` tells the caller nothing changed).
+"""
+import copy
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+DEFAULT_TIMEOUT = (3.05, 10)
+MAX_RETRIES = 3
+POOL_SIZE = 16
+ETAG_CACHE_SIZE = 256
+MAX_RATE_LIMIT_WAIT = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimitError(requests.RequestException):
+    pass
+
+
+def backoff_delay(attempt, base=0.25, cap=4.0):
+    """Full-jitter exponential backoff, shared by HTTP retries and write-conflict retries."""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class GitHubClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, pool_size=POOL_SIZE):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._etags = OrderedDict()
+        self.rate_limit = {"remaining": None, "reset": None}
+        metrics.set_gauge("github_rate_limit_remaining", lambda: self.rate_limit["remaining"] or 0)
+
+    # --- Rate limit bookkeeping ---
+    def _record_rate_limit(self, resp):
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            with self._lock:
+                self.rate_limit = {"remaining": int(remaining), "reset": int(reset)}
+
+    def _wait_for_rate_limit(self):
+        remaining, reset = self.rate_limit["remaining"], self.rate_limit["reset"]
+        if remaining != 0 or reset is None:
+            return
+        wait = reset - time.time()
+        if wait <= 0:
+            return
+        if wait > MAX_RATE_LIMIT_WAIT:
+            raise RateLimitError(f"GitHub rate limit exhausted, resets in {int(wait)}s")
+        time.sleep(wait)
+
+    @staticmethod
+    def _retry_after(resp, attempt):
+        if resp is not None and resp.headers.get("Retry-After", "").isdigit():
+            return float(resp.headers["Retry-After"])
+        return backoff_delay(attempt)
+
+    # --- ETag cache ---
+    @staticmethod
+    def _cache_key(url, headers):
+        auth = (headers or {}).get("Authorization", "")
+        return url, hashlib.sha1(auth.encode()).hexdigest()
+
+    def _cached(self, key):
+        with self._lock:
+            if key in self._etags:
+                self._etags.move_to_end(key)
+                return self._etags[key]
+        return None
+
+    def _store(self, key, resp):
+        with self._lock:
+            self._etags[key] = resp
+            self._etags.move_to_end(key)
+            while len(self._etags) > ETAG_CACHE_SIZE:
+                self._etags.popitem(last=False)
+
+    # --- Requests ---
+    def request(self, method, url, headers=None, timeout=None, conditional=True, **kwargs):
+        headers = dict(headers or {})
+        key = self._cache_key(url, headers) if method == "GET" and conditional else None
+        cached = self._cached(key) if key else None
+        if cached is not None:
+            headers["If-None-Match"] = cached.headers["ETag"]
+
+        resp = None
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_rate_limit()
+            try:
+                resp = self.session.request(method, url, headers=headers, timeout=timeout or self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.count("github_errors_total", method=method)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            self._record_rate_limit(resp)
+            rate_limited = resp.status_code == 403 and resp.headers.get("X-RateLimit-Remaining") == "0"
+            if (resp.status_code in RETRY_STATUSES or rate_limited) and attempt < self.max_retries:
+                metrics.count("github_retries_total", method=method, status=resp.status_code)
+                time.sleep(self._retry_after(resp, attempt))
+                continue
+            break
+        metrics.observe("github_request_seconds", time.perf_counter() - started, method=method)
+        metrics.count("github_requests_total", method=method, status=resp.status_code)
+
+        if resp.status_code == 304 and cached is not None:
+            resp = copy.copy(cached)
+            resp.not_modified = True
+            return resp
+        resp.not_modified = False
+        if key and resp.status_code == 200 and "ETag" in resp.headers:
+            self._store(key, resp)
+        return resp
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide client shared by every app and backend."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GitHubClient()
+        return _client
@@ -0,0 +1,142 @@
+"""Incremental team leaderboard.
+
+The team_code -> Class mapping is built once per participant list as a
+categorical index, RPS wins are accumulated per class as new result rows
+arrive, and the final table is only re-assembled and re-sorted when one of
+the inputs actually changed.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+RPS_COL = 'game1'
+SCORE_COLS = [RPS_COL, 'game2', 'game3', 'game4', 'game5', 'game6']
+
+
+def normalize(values):
+    return values.astype(str).str.strip().str.upper()
+
+
+# The only result fields the leaderboard reads; per-game detail (aggregates, packed moves) never changes its output
+RESULT_COLS = ['id', 'team_code', 'timestamp', 'win']
+
+
+def frame_version(df, columns=None):
+    """Content hash of a frame (or of ``columns`` only), stored in ``df.attrs`` so cached copies keep it."""
+    if "version" not in df.attrs:
+        if columns is not None:
+            # Scalar columns only: no per-row scan for nested values
+            hashable = df[[c for c in columns if c in df.columns]]
+        else:
+            hashable = df
+            # Per-game detail (aggregates, packed moves) arrives as dicts/lists; hash their text form
+            nested = [c for c in df.columns if df[c].dtype == object and df[c].map(lambda v: isinstance(v, (dict, list))).any()]
+            if nested:
+                hashable = df.assign(**{c: df[c].astype(str) for c in nested})
+        df.attrs["version"] = int(pd.util.hash_pandas_object(hashable, index=False).sum()) if not hashable.empty else 0
+    return df.attrs["version"]
+
+
+def result_ids(rps_df):
+    if "id" in rps_df.columns:
+        return rps_df["id"].astype(str)
+    # Older records without an id: team code + timestamp is unique per game
+    return rps_df["team_code"].astype(str) + "@" + rps_df.get("timestamp", pd.Series("", index=rps_df.index)).astype(str)
+
+
+class TeamLeaderboard:
+    def __init__(self, score_cols=SCORE_COLS):
+        self.score_cols = list(score_cols)
+        self._lock = threading.Lock()
+        self._participants_version = None
+        self._scores_version = None
+        self._results_version = None
+        self._class_of = pd.Series(dtype="category")
+        self._reset_results()
+        self._table = None
+
+    def _reset_results(self):
+        self._wins = np.zeros(len(self._class_of.cat.categories), dtype=np.int64)
+        self._seen = set()
+        # Ids and wins of the rows counted so far, in frame order
+        self._row_ids = np.empty(0, dtype=object)
+        self._row_wins = np.empty(0)
+
+    # --- team_code -> Class index ---
+    def _index_participants(self, part_df):
+        part = pd.DataFrame({
+            "team_code": normalize(part_df["team_code"]),
+            "Class": normalize(part_df["Class"])
+        }).drop_duplicates("team_code")
+        self._class_of = pd.Series(pd.Categorical(part["Class"]), index=pd.Index(part["team_code"]))
+        # Class assignment changed, so every result has to be re-attributed
+        self._reset_results()
+
+    # --- Per-class RPS wins, only for rows appended since the last build ---
+    def _add_results(self, rps_df):
+        if rps_df.empty or "team_code" not in rps_df.columns:
+            self._reset_results()
+            return
+        ids = result_ids(rps_df).to_numpy()
+        wins = rps_df["win"] if "win" in rps_df.columns else pd.Series(0, index=rps_df.index)
+        wins = pd.to_numeric(wins, errors="coerce").fillna(0).to_numpy()
+        done = len(self._row_ids)
+        # Results are appended, so normally every counted row is still there, unchanged, in front.
+        # Otherwise a result was deleted, edited or reordered: count everything again
+        if not (len(ids) >= done and np.array_equal(ids[:done], self._row_ids)
+                and np.array_equal(wins[:done], self._row_wins)):
+            metrics.count("leaderboard_reaggregations_total")
+            self._reset_results()
+            done = 0
+        tail = pd.Index(ids[done:])
+        # The same result can be listed twice (e.g. in the log and as a legacy file); count it once
+        new = ~tail.duplicated()
+        if self._seen:
+            # A set, not an Index: appending to an Index rebuilds its hash table over the whole history
+            new &= np.fromiter((i not in self._seen for i in tail), dtype=bool, count=len(tail))
+        if new.any():
+            team_codes = rps_df["team_code"].iloc[done:][new]
+            codes = self._class_of.reindex(normalize(team_codes)).cat.codes.to_numpy()
+            tail_wins = wins[done:][new]
+            known = codes >= 0
+            self._wins += np.bincount(codes[known], weights=tail_wins[known], minlength=len(self._wins)).astype(np.int64)
+            self._seen.update(tail[new])
+        self._row_ids, self._row_wins = ids, wins
+
+    def _assemble(self, score_df):
+        merged = score_df.copy()
+        merged["Class"] = normalize(merged["Class"]) if "Class" in merged.columns else pd.Series(dtype=str)
+        wins = pd.Series(self._wins, index=self._class_of.cat.categories)
+        # Rock-Paper-Scissors wins come from game results, the other columns from manual scores
+        merged[RPS_COL] = merged["Class"].map(wins)
+        merged = merged.fillna(0)
+        for col in self.score_cols:
+            if col not in merged.columns:
+                merged[col] = 0
+        merged['total'] = merged[self.score_cols].sum(axis=1)
+        return merged.sort_values("total", ascending=False, kind="stable").reset_index(drop=True)
+
+    @metrics.timed("leaderboard_build_seconds")
+    def build(self, rps_df, part_df, score_df):
+        versions = (frame_version(part_df), frame_version(rps_df, RESULT_COLS), frame_version(score_df))
+        with self._lock:
+            if self._table is not None and versions == (
+                self._participants_version, self._results_version, self._scores_version
+            ):
+                metrics.count("leaderboard_builds_total", outcome="unchanged")
+                return self._table
+            metrics.count("leaderboard_builds_total", outcome="rebuilt")
+
+            if versions[0] != self._participants_version:
+                self._index_participants(part_df)
+            if versions[0] != self._participants_version or versions[1] != self._results_version:
+                self._add_results(rps_df)
+
+            self._table = self._assemble(score_df)
+            # Stamped from the input versions, so viewers can key render caches on it for free
+            self._table.attrs["version"] = hash(versions)
+            self._participants_version, self._results_version, self._scores_version = versions
+            return self._table
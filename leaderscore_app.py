@@ -1,140 +1,165 @@
 import streamlit as st
 import pandas as pd
 import requests
-import base64
-import io
-
-# --- GitHub Config ---
-GITHUB_USERNAME = "limfw"
-GITHUB_REPO = "sunway"
-GITHUB_TOKEN = st.secrets['github']['token']
-GITHUB_FOLDER = "results"
-PARTICIPANT_FILE = "participant.csv"
-MANUAL_SCORE_FILE = "manual_scores.csv"
+import time
+
+import events
+import metrics
+import storage
+from change_feed import ChangeFeed
+from leaderboard import RESULT_COLS, TeamLeaderboard, frame_version
+
+run_started = time.perf_counter()
+metrics.serve_from_env()
+
+# --- Event: ?event=<key> selects one of the [events] in secrets (see events.py) ---
+try:
+    event = events.get_event(st.secrets, st.query_params.get("event"))
+except events.EventNotFound:
+    event = None
+
+# --- Storage backend (GitHub by default, local directory + SQLite for LAN events) ---
+# Shared by every event (and app) that reads the same repo or directory
+@st.cache_resource
+def get_storage(event_key):
+    return events.get_backend(events.get_event(st.secrets, event_key))
+
+# --- Change feed: a background poller per event bumps a version per dataset when it changes ---
+@st.cache_resource
+def get_change_feed(event_key):
+    return ChangeFeed(get_storage(event_key), interval=st.secrets.get("live", {}).get("poll_seconds", 10))
 
 # --- Load RPS Results (Game 1) ---
-@st.cache_data(ttl=30)
-def load_rps_results():
-    url = f"https://api.github.com/repos/{GITHUB_USERNAME}/{GITHUB_REPO}/contents/{GITHUB_FOLDER}"
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
-    resp = requests.get(url, headers=headers)
-
-    results = []
-    if resp.status_code == 200:
-        for file in resp.json():
-            if file["name"].endswith(".json"):
-                json_url = file["download_url"]
-                data = requests.get(json_url).json()
-                results.append(data)
-    return pd.DataFrame(results)
+# Loaders are keyed on their dataset's version, so a change reloads only that dataset
+# (the TTL is only a safety net for a failed load). Each one stamps a content hash on the frame so the leaderboard can skip unchanged inputs.
+# One cache for all events: two versions each for up to eight events
+@metrics.cache_data(ttl=300, max_entries=16)
+def load_rps_results(event_key, version):
+    try:
+        df = pd.DataFrame(get_storage(event_key).load_results())
+    except (requests.RequestException, storage.StorageError):
+        df = pd.DataFrame()
+    frame_version(df, RESULT_COLS)
+    return df
 
 # --- Load participant.csv ---
-@st.cache_data(ttl=60)
-def load_participant_info():
-    url = f"https://raw.githubusercontent.com/{GITHUB_USERNAME}/{GITHUB_REPO}/main/{PARTICIPANT_FILE}"
-    return pd.read_csv(url)
+@metrics.cache_data(ttl=300, max_entries=16)
+def load_participant_info(event_key, version):
+    df = get_storage(event_key).load_participants()
+    frame_version(df)
+    return df
 
 # --- Load manual_scores.csv ---
-@st.cache_data(ttl=30)
-def load_manual_scores():
-    url = f"https://api.github.com/repos/{GITHUB_USERNAME}/{GITHUB_REPO}/contents/{MANUAL_SCORE_FILE}"
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
-    response = requests.get(url, headers=headers)
-
-    if response.status_code == 200:
-        content = response.json()["content"]
-        decoded = base64.b64decode(content)
-        return pd.read_csv(io.StringIO(decoded.decode()))
-    else:
-        st.error("❌ Failed to load manual_scores.csv from GitHub")
-        return pd.DataFrame()
+@metrics.cache_data(ttl=300, max_entries=16)
+def load_manual_scores(event_key, version):
+    try:
+        df = get_storage(event_key).load_manual_scores()
+    except (OSError, requests.RequestException, storage.StorageError):
+        st.error("❌ Failed to load manual_scores.csv")
+        df = pd.DataFrame(columns=["Class"])
+    frame_version(df)
+    return df
 
 # --- Build Team-Level Leaderboard ---
-def build_team_leaderboard():
-    rps_df = load_rps_results()
-    part_df = load_participant_info()
-    score_df = load_manual_scores()
-
-    part_df["team_code"] = part_df["team_code"].astype(str).str.strip().str.upper()
-    part_df["Class"] = part_df["Class"].astype(str).str.strip().str.upper()
-    score_df["Class"] = score_df["Class"].astype(str).str.strip().str.upper()
-
-    # Safe fallback if no RPS JSON files exist
-    if rps_df.empty or "team_code" not in rps_df.columns:
-        rps_df = pd.DataFrame(columns=['team_code', 'win', 'timestamp', 'Class'])
-        team_rps = part_df[['Class']].drop_duplicates()
-        team_rps["game1"] = 0
-    else:
-        rps_df["team_code"] = rps_df["team_code"].astype(str).str.strip().str.upper()
-        rps_df = pd.merge(rps_df, part_df, on="team_code", how="left")
-        team_rps = rps_df.groupby("Class")['win'].sum().reset_index(name="game1")
-
-    all_teams = part_df[['Class']].drop_duplicates()
-    team_rps = pd.merge(all_teams, team_rps, on="Class", how="left").fillna({"game1": 0})
-    merged = pd.merge(score_df, team_rps, on="Class", how="left").fillna(0)
-
-    score_cols = ['game1', 'game2', 'game3', 'game4', 'game5', 'game6']
-    merged['total'] = merged[score_cols].sum(axis=1)
-
-    return merged.sort_values("total", ascending=False).reset_index(drop=True)
+@st.cache_resource
+def get_team_leaderboard(event_key, score_cols):
+    return TeamLeaderboard(score_cols)
+
+def build_team_leaderboard(event, versions):
+    # One per event, shared across its viewers; only new result rows are aggregated and the
+    # table is re-sorted only when results, participants or manual scores changed
+    return get_team_leaderboard(event.key, tuple(event.score_cols)).build(
+        load_rps_results(event.key, versions["results"]),
+        load_participant_info(event.key, versions["participants"]),
+        load_manual_scores(event.key, versions["manual_scores"])
+    )
+
+# --- Rendered podium and table, built once per leaderboard version for all viewers ---
+def format_class(c): return str(c).upper().strip()
+
+# Podium slot per rank (0 = champion); shown silver, gold, bronze from left to right
+PODIUM_SLOTS = {
+    1: """
+            <div style='flex:1; background:#E0E0E0; padding:15px; border-radius:20px; text-align:center; box-shadow:2px 2px 8px rgba(0,0,0,0.2);'>
+                <div style='font-size: 40px;'>🥈</div>
+                <div style='font-size: 20px; font-weight:bold;'>{name}</div>
+                <div style='font-size: 18px;'>{points} pts</div>
+            </div>""",
+    0: """
+            <div style='flex:1.2; background:#FFD700; padding:20px; border-radius:20px; text-align:center; transform: scale(1.1); box-shadow:2px 2px 10px rgba(0,0,0,0.4);'>
+                <div style='font-size: 60px;'>🏆</div>
+                <div style='font-size: 24px; font-weight:bold;'>Champion</div>
+                <div style='font-size: 22px; font-weight:bold; margin-top:5px;'>{name}</div>
+                <div style='font-size: 20px;'>{points} pts</div>
+            </div>""",
+    2: """
+            <div style='flex:1; background:#CD7F32; padding:15px; border-radius:20px; text-align:center; box-shadow:2px 2px 8px rgba(0,0,0,0.2);'>
+                <div style='font-size: 38px;'>🥉</div>
+                <div style='font-size: 20px; font-weight:bold;'>{name}</div>
+                <div style='font-size: 18px;'>{points} pts</div>
+            </div>""",
+}
+
+@st.cache_resource(max_entries=16)
+def render_leaderboard(version, games, _df):
+    top3 = _df.head(3).copy()
+    top3["Class"] = top3["Class"].apply(format_class)
+
+    # An event with fewer than three classes only fills the slots it has
+    places = {rank: row for rank, row in enumerate(top3.itertuples(index=False))}
+    slots = "".join(
+        html.format(name=places[rank].Class, points=int(places[rank].total))
+        for rank, html in PODIUM_SLOTS.items() if rank in places
+    )
+    podium_html = f"""
+        <div style='display: flex; justify-content: center; align-items: flex-end; gap: 40px; margin-top: 30px;'>{slots}
+        </div>
+        """
+
+    # games: (column, display name) pairs in the event's order
+    display_df = _df[["Class", *(col for col, _ in games), "total"]].copy()
+    display_df.rename(columns={**dict(games), "Class": "Team"}, inplace=True)
+    return podium_html, display_df
+
+# --- Live updates: re-render this viewer only when a dataset version moved ---
+@st.experimental_fragment(run_every=2)
+def watch_for_changes(event_key, rendered_versions):
+    if get_change_feed(event_key).versions() != rendered_versions:
+        st.rerun()
 
 # --- Streamlit UI ---
-st.set_page_config("🏆 MATRIX Leaderboard", layout="centered")
-st.title("🏆 Top Teams Across All 6 Games")
+st.set_page_config(f"🏆 {event.title if event else events.DEFAULT_TITLE} Leaderboard", layout="centered")
+if event is None:
+    st.error(f"❌ Unknown event: {st.query_params.get('event')}")
+    st.stop()
+st.title(f"🏆 Top Teams Across All {len(event.games)} Games")
+
+if st.query_params.get("debug") == "metrics":
+    metrics.debug_view()
+    st.stop()
 
 # --- Manual Refresh Button ---
+# Checks for changes right away; only datasets that actually changed are reloaded
 if st.button("🔁 Refresh Leaderboard Now"):
-    st.cache_data.clear()
-    st.experimental_rerun()
+    get_change_feed(event.key).poll()
 
-df = build_team_leaderboard()
+versions = get_change_feed(event.key).versions()
+df = build_team_leaderboard(event, versions)
+render_started = time.perf_counter()
 
 if df.empty:
     st.warning("No results available yet.")
 else:
-    st.markdown("## 🏅 Top 3 Teams")
+    podium_html, display_df = render_leaderboard(frame_version(df), tuple(event.games.items()), df)
 
-    def format_class(c): return str(c).upper().strip()
-    top3 = df.head(3).copy()
-    top3["Class"] = top3["Class"].apply(format_class)
-
-    st.markdown(
-        f"""
-        <div style='display: flex; justify-content: center; align-items: flex-end; gap: 40px; margin-top: 30px;'>
-            <div style='flex:1; background:#E0E0E0; padding:15px; border-radius:20px; text-align:center; box-shadow:2px 2px 8px rgba(0,0,0,0.2);'>
-                <div style='font-size: 40px;'>🥈</div>
-                <div style='font-size: 20px; font-weight:bold;'>{top3.iloc[1]["Class"]}</div>
-                <div style='font-size: 18px;'>{int(top3.iloc[1]["total"])} pts</div>
-            </div>
-            <div style='flex:1.2; background:#FFD700; padding:20px; border-radius:20px; text-align:center; transform: scale(1.1); box-shadow:2px 2px 10px rgba(0,0,0,0.4);'>
-                <div style='font-size: 60px;'>🏆</div>
-                <div style='font-size: 24px; font-weight:bold;'>Champion</div>
-                <div style='font-size: 22px; font-weight:bold; margin-top:5px;'>{top3.iloc[0]["Class"]}</div>
-                <div style='font-size: 20px;'>{int(top3.iloc[0]["total"])} pts</div>
-            </div>
-            <div style='flex:1; background:#CD7F32; padding:15px; border-radius:20px; text-align:center; box-shadow:2px 2px 8px rgba(0,0,0,0.2);'>
-                <div style='font-size: 38px;'>🥉</div>
-                <div style='font-size: 20px; font-weight:bold;'>{top3.iloc[2]["Class"]}</div>
-                <div style='font-size: 18px;'>{int(top3.iloc[2]["total"])} pts</div>
-            </div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown("## 🏅 Top 3 Teams")
+    st.markdown(podium_html, unsafe_allow_html=True)
 
     # Display full leaderboard with renamed column labels and no index
     st.markdown("## 📋 Full Results")
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
 
-    DISPLAY_NAMES = {
-        "game2": "Dodgeball",
-        "game3": "Captain Ball",
-        "game4": "Graph Theoretical",
-        "game5": "Topological",
-        "game6": "Logic & Recreation",
-        "game1": "Rock-Paper-Scissors"
-    }
-
-    display_df = df[["Class", "game2", "game3", "game4", "game5", "game6", "game1", "total"]].copy()
-    display_df.rename(columns={**DISPLAY_NAMES, "Class": "Team"}, inplace=True)
+watch_for_changes(event.key, versions)
 
-    st.dataframe(display_df, use_container_width=True, hide_index=True)
+metrics.observe("render_seconds", time.perf_counter() - render_started, app="leaderboard")
+metrics.observe("script_run_seconds", time.perf_counter() - run_started, app="leaderboard")
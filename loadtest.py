@@ -0,0 +1,472 @@
+"""Load test for app.py: N simulated teams playing at once against one server.
+
+Starts ``app.py`` in a real Streamlit server (a child process) and connects
+headless players to its websocket, speaking the same protobuf messages as
+the browser: each one enters a team code, plays 60 moves with some think
+time, keeps the 1-second countdown fragment ticking like the frontend does,
+and lets the result be saved. GitHub is replaced inside the server by an
+in-memory stub of the contents API (optionally with injected latency);
+``--backend local`` uses the SQLite backend instead.
+
+    python loadtest.py --levels 1,2,4,8,16 --think-ms 400
+    python loadtest.py --levels 8 --github-latency-ms 150 --json
+
+For each concurrency level it reports latency percentiles for moves,
+countdown ticks and logins, server CPU time and memory per session, and
+throughput. The saturation point is the first level where throughput stops
+growing or p95 move latency breaks ``--slo-ms``. CPU and memory are read
+from ``/proc``, so those two columns are Linux only.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+ROUNDS = 60
+STUB_USER, STUB_REPO = "loadtest", "rps"
+MOVE_KEYS = "RPS"
+
+
+# --- In-memory GitHub (runs inside the server process) ---
+class GitHubStub:
+    """Just enough of the contents API and raw.githubusercontent.com for the storage backend.
+
+    Installed as the shared client's ``session``, so retries, ETags and
+    pooling in ``github_client`` are still exercised. Writes are mirrored to
+    ``mirror_dir`` so the load generator can count saved results.
+    """
+
+    def __init__(self, files, latency_ms=0, mirror_dir=None):
+        self.files = dict(files)   # repo path -> bytes
+        self.latency = latency_ms / 1000
+        self.mirror_dir = mirror_dir
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _sha(content):
+        return hashlib.sha1(content).hexdigest()
+
+    @staticmethod
+    def _response(status, body=b"", headers=None):
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+        resp.headers = CaseInsensitiveDict(headers or {})
+        return resp
+
+    def _get(self, path, if_none_match):
+        if path in self.files:
+            content = self.files[path]
+            body = {"name": path.rsplit("/", 1)[-1], "path": path, "sha": self._sha(content),
+                    "content": base64.b64encode(content).decode()}
+        else:
+            children = sorted(p for p in self.files if p.startswith(path + "/"))
+            if not children:
+                return self._response(404, {"message": "Not Found"})
+            body = [{"name": p.rsplit("/", 1)[-1], "path": p, "sha": self._sha(self.files[p]),
+                     "download_url": f"https://raw.githubusercontent.com/{STUB_USER}/{STUB_REPO}/main/{p}"}
+                    for p in children]
+        etag = '"%s"' % hashlib.sha1(json.dumps(body).encode()).hexdigest()
+        if if_none_match == etag:
+            return self._response(304, headers={"ETag": etag})
+        return self._response(200, body, {"ETag": etag})
+
+    def _put(self, path, payload):
+        current = self.files.get(path)
+        if current is not None and payload.get("sha") != self._sha(current):
+            return self._response(409 if payload.get("sha") else 422, {"message": "sha mismatch"})
+        if current is None and payload.get("sha"):
+            return self._response(409, {"message": "sha mismatch"})
+        content = base64.b64decode(payload["content"])
+        self.files[path] = content
+        if self.mirror_dir:
+            target = os.path.join(self.mirror_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(content)
+        return self._response(200 if current is not None else 201, {"content": {"sha": self._sha(content)}})
+
+    def request(self, method, url, headers=None, json=None, timeout=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urlparse(url)
+        with self.lock:
+            if parsed.netloc == "raw.githubusercontent.com":
+                path = parsed.path.split("/", 4)[-1]
+                if path not in self.files:
+                    return self._response(404, b"404: Not Found")
+                return self._response(200, self.files[path])
+            path = parsed.path.split("/contents/", 1)[1]
+            if method == "GET":
+                return self._get(path, (headers or {}).get("If-None-Match"))
+            if method == "PUT":
+                return self._put(path, json)
+            if method == "DELETE":
+                self.files.pop(path, None)
+                return self._response(200, {})
+        return self._response(405, {"message": method})
+
+
+def serve(args):
+    """Child process: install the stub if asked, then run app.py in a normal Streamlit server."""
+    from streamlit.web import bootstrap
+
+    from github_client import get_client
+
+    if args.backend == "github":
+        files = {}
+        for name in ["team_code.csv", "participant.csv", "manual_scores.csv"]:
+            with open(os.path.join(args.data_dir, name), "rb") as f:
+                files[name] = f.read()
+        mirror = os.path.join(args.data_dir, "github")
+        get_client().session = GitHubStub(files, args.github_latency_ms, mirror_dir=mirror)
+    # Option names use "_" for "." like the `streamlit run` flags they stand in for
+    flags = {
+        "server_port": args.port,
+        "server_address": "127.0.0.1",
+        "server_headless": True,
+        "server_fileWatcherType": "none",
+        "server_runOnSave": False,
+        "browser_gatherUsageStats": False,
+        "global_developmentMode": False,
+    }
+    bootstrap.load_config_options(flags)
+    bootstrap.run(APP_PATH, False, [], flags)
+
+
+# --- Test data ---
+def prepare_data(codes, data_dir, backend):
+    with open(os.path.join(data_dir, "team_code.csv"), "w", encoding="utf-8") as f:
+        f.write("\n".join(codes) + "\n")
+    with open(os.path.join(data_dir, "participant.csv"), "w", encoding="utf-8") as f:
+        f.write("team_code,Class,Name\n" + "".join(f"{c},LOAD,Player {c}\n" for c in codes))
+    with open(os.path.join(data_dir, "manual_scores.csv"), "w", encoding="utf-8") as f:
+        f.write("Class,game1,game2,game3,game4,game5,game6\nLOAD,0,0,0,0,0,0\n")
+    # The server runs with data_dir as its working directory, so this is its secrets.toml
+    os.makedirs(os.path.join(data_dir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(data_dir, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        if backend == "local":
+            f.write(f'[storage]\nbackend = "local"\npath = {json.dumps(data_dir)}\n')
+        else:
+            f.write(f'[github]\nusername = "{STUB_USER}"\nrepo = "{STUB_REPO}"\ntoken = "loadtest"\n')
+
+
+def saved_count(backend, data_dir):
+    if backend == "github":
+        folder = os.path.join(data_dir, "github", "results")
+        return len(os.listdir(folder)) if os.path.isdir(folder) else 0
+    db = os.path.join(data_dir, "results.db")
+    if not os.path.exists(db):
+        return 0
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+# --- Server process measurements (Linux /proc) ---
+def process_cpu_seconds(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except OSError:
+        return None
+
+
+def process_rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))]
+
+
+# --- One headless player ---
+class Player:
+    """Speaks the browser's websocket protocol: BackMsg rerun requests in, ForwardMsg deltas out."""
+
+    def __init__(self, port, team_code, rounds, think_ms, seed):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.team_code = team_code
+        self.rounds = rounds
+        self.think = think_ms / 1000
+        self.rng = random.Random(seed)
+        self.timings = {"login": [], "move": [], "tick": []}
+        self.errors = []
+        self.widgets = {}
+        self.fragment = None
+        self.cached = {}
+        self.ws = None
+
+    async def _rerun(self, kind, widget_states=(), fragment_id=""):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+        else:
+            self.fragment = None
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        started = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("server closed the connection")
+            fwd = ForwardMsg.FromString(raw)
+            kind_of = fwd.WhichOneof("type")
+            if kind_of == "ref_hash":
+                fwd = self.cached[fwd.ref_hash]
+                kind_of = fwd.WhichOneof("type")
+            elif fwd.metadata.cacheable:
+                self.cached[fwd.hash] = fwd
+            if kind_of == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._element(fwd.delta.new_element)
+            elif kind_of == "auto_rerun":
+                self.fragment = (fwd.auto_rerun.fragment_id, fwd.auto_rerun.interval)
+            elif kind_of == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                self.timings[kind].append((time.perf_counter() - started) * 1000)
+                return
+
+    def _element(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors.append(f"{element.exception.type}: {element.exception.message}")
+        elif kind in ("button", "text_input"):
+            widget = getattr(element, kind)
+            self.widgets[widget.id] = kind
+
+    def _widget(self, kind, suffix=""):
+        return next((wid for wid, k in self.widgets.items() if k == kind and wid.endswith(suffix)), None)
+
+    def _state(self, widget_id, **value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        return WidgetState(id=widget_id, **value)
+
+    async def _wait(self, seconds):
+        """Sleep, sending countdown ticks on the fragment's interval like the frontend does."""
+        until = time.perf_counter() + seconds
+        while True:
+            now = time.perf_counter()
+            if self.fragment is None:
+                await asyncio.sleep(max(0.0, until - now))
+                return
+            fragment_id, interval = self.fragment
+            next_tick = getattr(self, "_last_tick", now) + interval
+            if next_tick >= until:
+                await asyncio.sleep(max(0.0, until - now))
+                return
+            await asyncio.sleep(max(0.0, next_tick - now))
+            self._last_tick = time.perf_counter()
+            await self._rerun("tick", fragment_id=fragment_id)
+
+    async def play(self):
+        from tornado.websocket import websocket_connect
+
+        self.ws = await websocket_connect(self.url, subprotocols=["streamlit"])
+        try:
+            await self._rerun("login")
+            text_id = self._widget("text_input")
+            submit_id = self._widget("button", "-Start Game")
+            await self._rerun("login", [
+                self._state(text_id, string_value=self.team_code),
+                self._state(submit_id, trigger_value=True),
+            ])
+            self._last_tick = time.perf_counter()
+            for _ in range(self.rounds):
+                if self.errors:
+                    break
+                await self._wait(self.rng.uniform(0.5, 1.5) * self.think)
+                move = self._widget("button", "-" + self.rng.choice(MOVE_KEYS))
+                if move is None:
+                    self.errors.append("move buttons not found")
+                    break
+                await self._rerun("move", [self._state(move, trigger_value=True)])
+        except Exception as e:
+            self.errors.append(repr(e))
+        finally:
+            self.ws.close()
+        return self
+
+
+# --- One concurrency level ---
+async def run_players(port, codes, args):
+    async def start(i, code):
+        await asyncio.sleep(random.Random(f"{args.seed}:{code}").uniform(0, args.ramp_s))
+        return await Player(port, code, args.rounds, args.think_ms, f"{args.seed}:{code}").play()
+
+    return await asyncio.gather(*(start(i, c) for i, c in enumerate(codes)))
+
+
+def run_level(port, server_pid, codes, args):
+    saved_before = saved_count(args.backend, args.data_dir)
+    cpu_start, rss_start = process_cpu_seconds(server_pid), process_rss_bytes(server_pid)
+    wall_start = time.perf_counter()
+    players = asyncio.run(run_players(port, codes, args))
+    wall = time.perf_counter() - wall_start
+    cpu_end, rss_end = process_cpu_seconds(server_pid), process_rss_bytes(server_pid)
+
+    # Results are uploaded by the server's background queue; give it time to drain
+    drain_start = time.perf_counter()
+    while (saved_count(args.backend, args.data_dir) - saved_before < len(players)
+           and time.perf_counter() - drain_start < args.drain_timeout):
+        time.sleep(0.1)
+
+    timings = {kind: [ms for p in players for ms in p.timings[kind]] for kind in ("login", "move", "tick")}
+    reruns = sum(len(v) for v in timings.values())
+    count = len(players)
+    report = {
+        "concurrency": count,
+        "reruns": reruns,
+        "reruns_per_s": round(reruns / wall, 1),
+        "errors": sum(len(p.errors) for p in players),
+        "results_saved": saved_count(args.backend, args.data_dir) - saved_before,
+        "drain_s": round(time.perf_counter() - drain_start, 2),
+        "wall_s": round(wall, 2),
+    }
+    for kind, values in timings.items():
+        for pct in (50, 95, 99):
+            report[f"{kind}_p{pct}_ms"] = round(percentile(values, pct), 1)
+    report["move_max_ms"] = round(max(timings["move"], default=0.0), 1)
+    if cpu_start is not None and cpu_end is not None:
+        report["server_cpu_ms_per_session"] = round((cpu_end - cpu_start) * 1000 / count, 1)
+    if rss_start is not None and rss_end is not None:
+        report["server_rss_mb"] = round(rss_end / 2 ** 20, 1)
+        report["server_rss_mb_per_session"] = round((rss_end - rss_start) / count / 2 ** 20, 2)
+    report["first_errors"] = [e for p in players for e in p.errors][:3]
+    return report
+
+
+def saturation_point(reports, slo_ms, min_gain=0.1):
+    """First level whose throughput gain is under ``min_gain`` or whose p95 move latency breaks the SLO."""
+    for prev, cur in zip([None] + reports, reports):
+        if cur["move_p95_ms"] > slo_ms:
+            return cur["concurrency"], f"move p95 {cur['move_p95_ms']}ms > {slo_ms}ms"
+        if prev is not None and cur["reruns_per_s"] < prev["reruns_per_s"] * (1 + min_gain):
+            return cur["concurrency"], f"throughput {prev['reruns_per_s']} -> {cur['reruns_per_s']} reruns/s"
+    return None, "not reached"
+
+
+# --- Server lifecycle ---
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, port):
+    env = dict(os.environ, RPS_RESULT_JOURNAL=os.path.join(args.data_dir, "result_journal.db"))
+    env.pop("RPS_SESSION_DB", None)
+    env.pop("RPS_STORAGE", None)
+    log = open(os.path.join(args.data_dir, "server.log"), "w")
+    cmd = [sys.executable, os.path.abspath(__file__), "serve", "--port", str(port), "--data-dir", args.data_dir,
+           "--backend", args.backend, "--github-latency-ms", str(args.github_latency_ms)]
+    proc = subprocess.Popen(cmd, cwd=args.data_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    with open(os.path.join(args.data_dir, "server.log")) as f:
+        raise RuntimeError("Streamlit server did not start:\n" + f.read()[-2000:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive concurrent headless players through app.py.")
+    parser.add_argument("command", nargs="?", choices=["run", "serve"], default="run", help=argparse.SUPPRESS)
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated concurrency levels to step through")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--think-ms", type=float, default=400, help="mean pause between a player's moves")
+    parser.add_argument("--ramp-s", type=float, default=1.0, help="spread session starts over this many seconds")
+    parser.add_argument("--backend", choices=["github", "local"], default="github",
+                        help="github = in-memory GitHub stub, local = SQLite backend")
+    parser.add_argument("--github-latency-ms", type=float, default=0, help="delay added to every stub call")
+    parser.add_argument("--slo-ms", type=float, default=250, help="p95 move latency considered saturated")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="seconds to wait for queued results")
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per level")
+    parser.add_argument("--port", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args)
+        return
+
+    levels = [int(n) for n in args.levels.split(",")]
+    codes = [f"load{i:05d}" for i in range(sum(levels) + 1)]
+    args.data_dir = tempfile.mkdtemp(prefix="rps-loadtest-")
+    port = free_port()
+    server = None
+    try:
+        prepare_data(codes, args.data_dir, args.backend)
+        server = start_server(args, port)
+        # One unmeasured game first, so imports and cold caches don't land on the first level
+        asyncio.run(run_players(port, codes[:1], args))
+        reports, offset = [], 1
+        for concurrency in levels:
+            report = run_level(port, server.pid, codes[offset:offset + concurrency], args)
+            offset += concurrency
+            reports.append(report)
+            if args.json:
+                print(json.dumps(report), flush=True)
+                continue
+            print(
+                f"{concurrency:>4} sessions: move p50 {report['move_p50_ms']:.0f}ms "
+                f"p95 {report['move_p95_ms']:.0f}ms p99 {report['move_p99_ms']:.0f}ms | "
+                f"tick p95 {report['tick_p95_ms']:.0f}ms | login p95 {report['login_p95_ms']:.0f}ms | "
+                f"{report['reruns_per_s']:.1f} reruns/s | "
+                f"CPU {report.get('server_cpu_ms_per_session', float('nan')):.0f}ms, "
+                f"RSS {report.get('server_rss_mb_per_session', float('nan')):+.2f}MB per session | "
+                f"{report['results_saved']}/{concurrency} saved, {report['errors']} errors",
+                flush=True
+            )
+            for error in report["first_errors"]:
+                print(f"      {error}")
+
+        level, reason = saturation_point(reports, args.slo_ms)
+        if args.json:
+            print(json.dumps({"saturation_concurrency": level, "reason": reason}))
+        else:
+            print(f"Saturation point: {level} sessions ({reason})" if level else "Saturation point: not reached")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        shutil.rmtree(args.data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Process-wide counters, timers and gauges with a Prometheus text exposition.
+
+    with metrics.timed("leaderboard_build_seconds"):
+        ...
+    @metrics.timed("ai_seconds", op="get_move")
+    def ...
+    metrics.count("github_requests_total", method="GET", status="200")
+
+``cache_data`` is a drop-in for ``st.cache_data`` that also counts hits and
+misses. The numbers are served as Prometheus text on ``RPS_METRICS_PORT``
+when that is set (``serve_from_env``), and every app shows them at
+``?debug=metrics`` (``debug_view``).
+"""
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_counters = {}     # (name, labels) -> value
+_timers = {}       # (name, labels) -> [count, sum, bucket counts...]
+_gauges = {}       # (name, labels) -> value or zero-argument callable
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# --- Recording ---
+def count(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        timer = _timers.get(key)
+        if timer is None:
+            timer = _timers[key] = [0, 0.0] + [0] * len(BUCKETS)
+        timer[0] += 1
+        timer[1] += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                timer[2 + i] += 1
+
+
+def set_gauge(name, value, **labels):
+    """Set a gauge; ``value`` may be a callable that is read at exposition time."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+class timed:
+    """Context manager and decorator that records the elapsed time in a histogram."""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self._started, **self.labels)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(self.name, time.perf_counter() - started, **self.labels)
+        return wrapper
+
+
+# --- Streamlit cache with hit/miss counts ---
+def cache_data(func=None, **cache_kwargs):
+    """``st.cache_data`` that counts requests and misses per function.
+
+    The wrapped function only runs on a miss, so misses are counted (and the
+    fill time measured) inside it; hits are requests minus misses.
+    """
+    import streamlit as st
+
+    def decorate(func):
+        label = func.__name__
+
+        @functools.wraps(func)
+        def fill(*args, **kwargs):
+            count("cache_misses_total", cache=label)
+            with timed("cache_fill_seconds", cache=label):
+                return func(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(fill)
+
+        @functools.wraps(func)
+        def lookup(*args, **kwargs):
+            count("cache_requests_total", cache=label)
+            return cached(*args, **kwargs)
+
+        lookup.clear = cached.clear
+        return lookup
+
+    return decorate(func) if func is not None else decorate
+
+
+# --- Exposition ---
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def snapshot():
+    """Plain-dict copy of every metric, for the debug view and tests."""
+    with _lock:
+        counters = dict(_counters)
+        timers = {k: list(v) for k, v in _timers.items()}
+        gauges = dict(_gauges)
+    gauges = {k: (v() if callable(v) else v) for k, v in gauges.items()}
+    requests = {labels: v for (name, labels), v in counters.items() if name == "cache_requests_total"}
+    for labels, total in requests.items():
+        counters[("cache_hits_total", labels)] = total - counters.get(("cache_misses_total", labels), 0)
+    return counters, timers, gauges
+
+
+def render():
+    """All metrics in the Prometheus text format."""
+    counters, timers, gauges = snapshot()
+    lines = []
+    for kind, items in (("counter", counters), ("gauge", gauges)):
+        for name in sorted({name for name, _ in items}):
+            lines.append(f"# TYPE rps_{name} {kind}")
+            for (n, labels), value in sorted(items.items()):
+                if n == name:
+                    lines.append(f"rps_{name}{_labels(labels)} {value}")
+    for name in sorted({name for name, _ in timers}):
+        lines.append(f"# TYPE rps_{name} histogram")
+        for (n, labels), timer in sorted(timers.items()):
+            if n != name:
+                continue
+            # observe() already counts each value in every bucket it fits, so these are cumulative
+            for bound, hits in zip(BUCKETS, timer[2:]):
+                lines.append(f"rps_{name}_bucket{_labels(labels, [('le', bound)])} {hits}")
+            lines.append(f"rps_{name}_bucket{_labels(labels, [('le', '+Inf')])} {timer[0]}")
+            lines.append(f"rps_{name}_sum{_labels(labels)} {timer[1]:.6f}")
+            lines.append(f"rps_{name}_count{_labels(labels)} {timer[0]}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def serve_from_env():
+    """Start the /metrics endpoint once per process if ``RPS_METRICS_PORT`` is set."""
+    global _server
+    port = os.environ.get("RPS_METRICS_PORT")
+    with _lock:
+        if _server is not None or not port:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((os.environ.get("RPS_METRICS_HOST", "127.0.0.1"), int(port)), _MetricsHandler)
+        except OSError:
+            # Another app on this machine already serves the port
+            return None
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
+
+
+def debug_view():
+    """Render the metrics as tables; the apps call this for ``?debug=metrics``."""
+    import pandas as pd
+    import streamlit as st
+
+    counters, timers, gauges = snapshot()
+    st.write("## 🔧 Metrics")
+    if timers:
+        st.write("### Timers")
+        st.dataframe(pd.DataFrame([
+            {"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in labels),
+             "count": t[0], "total_s": round(t[1], 4), "mean_ms": round(t[1] / t[0] * 1000, 3) if t[0] else 0.0}
+            for (name, labels), t in sorted(timers.items())
+        ]), hide_index=True, use_container_width=True)
+    if counters or gauges:
+        st.write("### Counters and gauges")
+        st.dataframe(pd.DataFrame([
+            {"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in labels), "value": value}
+            for (name, labels), value in sorted({**counters, **gauges}.items())
+        ]), hide_index=True, use_container_width=True)
+    with st.expander("Prometheus text"):
+        st.code(render(), language="text")
@@ -0,0 +1,46 @@
+"""Server-side move throttle, shared by every session of a team.
+
+One token bucket per key (event and team code): up to ``burst`` moves may
+come back to back, after that moves are admitted at ``rate`` per second. A
+person clicking as fast as they can stays under the default limits, while a
+script hammering the buttons gets its extra moves rejected before any AI
+work is done. Keying on the team rather than the browser session means
+opening more tabs does not buy more moves.
+"""
+import threading
+import time
+
+import metrics
+
+RATE = 5.0
+BURST = 5
+MAX_KEYS = 10000
+
+
+class MoveLimiter:
+    def __init__(self, rate=RATE, burst=BURST, max_keys=MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}   # key -> (tokens, updated at)
+        metrics.set_gauge("move_limiter_keys", lambda: len(self._buckets))
+
+    def allow(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        if not allowed:
+            metrics.count("moves_rejected_total", reason="rate")
+        return allowed
+
+    def _prune(self, now):
+        # A bucket that has refilled is the same as no bucket at all
+        refill = self.burst / self.rate
+        for key in [k for k, (_, updated_at) in self._buckets.items() if now - updated_at >= refill]:
+            del self._buckets[key]
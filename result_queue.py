@@ -0,0 +1,122 @@
+"""Durable write-behind queue for finished-game results.
+
+``enqueue`` writes the result to a local SQLite journal and returns at once;
+a background thread drains the journal into the storage backend, retrying
+with backoff until it succeeds. The record id is the idempotency key: the
+backends treat a second save of the same id as a no-op (the results log
+re-checks ids against the tail segment on every conflicting append), so a
+retry after a lost response cannot create a duplicate result.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+from github_client import backoff_delay
+
+JOURNAL_PATH = os.environ.get("RPS_RESULT_JOURNAL", os.path.join(".cache", "result_journal.db"))
+MAX_BACKOFF = 60
+
+
+class ResultQueue:
+    def __init__(self, backend, path=JOURNAL_PATH, start=True):
+        self.backend = backend
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending ("
+                " id TEXT PRIMARY KEY, team_code TEXT NOT NULL, record TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL, last_error TEXT)"
+            )
+        metrics.set_gauge("result_queue_pending", self.pending_count)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        if start:
+            self.start()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Producer side ---
+    def enqueue(self, record):
+        """Journal a result (it must carry an ``id``) and wake the worker."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO pending (id, team_code, record, next_attempt) VALUES (?, ?, ?, ?)",
+                (record["id"], record["team_code"], json.dumps(record), time.time())
+            )
+        self._wake.set()
+        return record["id"]
+
+    def is_pending(self, record_id):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM pending WHERE id = ?", (record_id,)).fetchone() is not None
+
+    def has_team(self, team_code):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM pending WHERE team_code = ? LIMIT 1", (team_code,)).fetchone() is not None
+
+    def pending_count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    # --- Worker side ---
+    def drain(self):
+        """Try every due entry once. Returns seconds until the next retry is due, or None."""
+        now = time.time()
+        with self._connect() as conn:
+            due = conn.execute(
+                "SELECT id, record, attempts FROM pending WHERE next_attempt <= ? ORDER BY rowid", (now,)
+            ).fetchall()
+        for record_id, record, attempts in due:
+            if self._stop.is_set():
+                break
+            try:
+                with metrics.timed("result_upload_seconds"):
+                    self.backend.save_result(json.loads(record))
+            except Exception as e:
+                metrics.count("result_upload_failures_total")
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE pending SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                        (attempts + 1, time.time() + backoff_delay(attempts, base=1.0, cap=MAX_BACKOFF),
+                         str(e)[:500], record_id)
+                    )
+            else:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM pending WHERE id = ?", (record_id,))
+        with self._connect() as conn:
+            row = conn.execute("SELECT MIN(next_attempt) FROM pending").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self.drain()
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+
+    def start(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="result-queue", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
@@ -0,0 +1,84 @@
+"""Incremental ingestion of the per-game result files in the GitHub results/ folder.
+
+Only files whose name or blob SHA has not been seen before are downloaded;
+everything else is served from a local JSON cache of parsed records.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import metrics
+from github_client import get_client
+
+CACHE_PATH = os.environ.get("RPS_RESULTS_CACHE", os.path.join(".cache", "results_cache.json"))
+MAX_WORKERS = 8
+
+
+# --- Local cache of parsed records ---
+class ResultsCache:
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def _fetch(self, file, headers):
+        # Blobs are immutable per SHA and already cached locally, so skip the ETag cache
+        resp = get_client().get(file["download_url"], headers=headers, conditional=False)
+        resp.raise_for_status()
+        return file["name"], file["sha"], resp.json()
+
+    def sync(self, listing, headers=None):
+        """Bring the cache in line with a contents listing and return its records."""
+        wanted = {f["name"]: f for f in listing if f["name"].endswith(".json")}
+
+        with self._lock:
+            changed = False
+            for name in list(self.entries):
+                if name not in wanted:
+                    del self.entries[name]
+                    changed = True
+
+            missing = [
+                f for name, f in wanted.items()
+                if name not in self.entries or self.entries[name]["sha"] != f["sha"]
+            ]
+            if missing:
+                metrics.count("results_files_fetched_total", len(missing))
+                with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(missing))) as pool:
+                    futures = [pool.submit(self._fetch, f, headers) for f in missing]
+                    for future in futures:
+                        try:
+                            name, sha, record = future.result()
+                        except (requests.RequestException, ValueError):
+                            # Leave it out of the cache so the next refresh retries it
+                            continue
+                        self.entries[name] = {"sha": sha, "record": record}
+                        changed = True
+
+            if changed:
+                self._save()
+
+            # The file stem is the record id, shared with the consolidated results log
+            return [
+                dict(self.entries[name]["record"], id=name[:-len(".json")])
+                for name in sorted(wanted) if name in self.entries
+            ]
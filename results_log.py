@@ -0,0 +1,204 @@
+"""Append-only, segmented JSON Lines log of game results stored in the GitHub repo.
+
+Results are appended to ``<folder>/segment-NNNNN.jsonl``; once a segment holds
+``segment_size`` records a new one is started, so sealed segments never change
+and readers only re-download the segment that is still growing.
+
+Run ``python results_log.py compact`` to fold the legacy one-file-per-game
+``results/`` layout into the log.
+"""
+import argparse
+import base64
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from github_client import backoff_delay, get_client
+from results_ingest import MAX_WORKERS
+
+LOG_FOLDER = "results_log"
+SEGMENT_SIZE = 500
+MAX_ATTEMPTS = 5
+
+
+def segment_name(index):
+    return f"segment-{index:05d}.jsonl"
+
+
+def record_id(filename):
+    # Legacy files are named {team_code}_{uuid}.json; the stem doubles as the record id
+    return filename[:-len(".json")] if filename.endswith(".json") else filename
+
+
+def parse_lines(text):
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class ResultsLog:
+    def __init__(self, username, repo, token, folder=LOG_FOLDER, segment_size=SEGMENT_SIZE, branch="main"):
+        self.username = username
+        self.repo = repo
+        self.token = token
+        self.folder = folder
+        self.segment_size = segment_size
+        self.branch = branch
+        self._lock = threading.Lock()
+        # segment name -> (blob sha, parsed records); sealed segments are read once
+        self._segments = {}
+
+    @property
+    def headers(self):
+        return {
+            "Authorization": f"Bearer {self.token}",
+            "Accept": "application/vnd.github+json"
+        }
+
+    def _url(self, path):
+        return f"https://api.github.com/repos/{self.username}/{self.repo}/contents/{path}"
+
+    def file_url(self, name):
+        return f"https://github.com/{self.username}/{self.repo}/blob/{self.branch}/{self.folder}/{name}"
+
+    # --- Reading ---
+    def list_segments(self):
+        resp = get_client().get(self._url(self.folder), headers=self.headers)
+        if resp.status_code == 404:
+            return []
+        resp.raise_for_status()
+        files = [f for f in resp.json() if f["name"].startswith("segment-") and f["name"].endswith(".jsonl")]
+        return sorted(files, key=lambda f: f["name"])
+
+    def _read_segment(self, name):
+        resp = get_client().get(self._url(f"{self.folder}/{name}"), headers=self.headers)
+        resp.raise_for_status()
+        body = resp.json()
+        text = base64.b64decode(body["content"]).decode("utf-8")
+        return text, body["sha"]
+
+    def load(self):
+        segments = self.list_segments()
+        with self._lock:
+            stale = [f for f in segments if self._segments.get(f["name"], (None,))[0] != f["sha"]]
+            if stale:
+                with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(stale))) as pool:
+                    for f, (text, sha) in zip(stale, pool.map(lambda f: self._read_segment(f["name"]), stale)):
+                        self._segments[f["name"]] = (sha, parse_lines(text))
+            names = [f["name"] for f in segments]
+            for name in list(self._segments):
+                if name not in names:
+                    del self._segments[name]
+            return [r for name in names for r in self._segments[name][1]]
+
+    # --- Writing ---
+    def append(self, records, message="Append results"):
+        """Append records to the tail segment, retrying on SHA conflicts. Returns the last segment written."""
+        pending = list(records)
+        name = None
+        while pending:
+            for attempt in range(MAX_ATTEMPTS):
+                segments = self.list_segments()
+                if segments:
+                    name = segments[-1]["name"]
+                    text, sha = self._read_segment(name)
+                    tail = parse_lines(text)
+                    count = len(tail)
+                    # A PUT whose response was lost (then retried into a 409/422) may already be in;
+                    # never append those records a second time
+                    written = {r.get("id") for r in tail if r.get("id") is not None}
+                    pending = [r for r in pending if r.get("id") is None or r.get("id") not in written]
+                    if not pending:
+                        break
+                else:
+                    name, text, sha, count = None, "", None, 0
+
+                if name is None or count >= self.segment_size:
+                    name = segment_name(len(segments) + 1)
+                    text, sha, count = "", None, 0
+                if text and not text.endswith("\n"):
+                    text += "\n"
+
+                batch = pending[:self.segment_size - count]
+                text += "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in batch)
+                payload = {
+                    "message": message,
+                    "content": base64.b64encode(text.encode("utf-8")).decode(),
+                    "branch": self.branch
+                }
+                if sha:
+                    payload["sha"] = sha
+
+                resp = get_client().put(self._url(f"{self.folder}/{name}"), headers=self.headers, json=payload)
+                if resp.status_code in [200, 201]:
+                    pending = pending[len(batch):]
+                    break
+                if resp.status_code in [409, 422]:
+                    # Someone else appended first; re-read the tail and try again
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                raise Exception(f"GitHub log append failed: {resp.status_code} — {resp.text}")
+            else:
+                raise Exception(f"GitHub log append failed: gave up after {MAX_ATTEMPTS} conflicting writes")
+        return name
+
+
+# --- Reader helper for the migration period ---
+def merge_with_legacy(log_records, legacy_records):
+    """Combine log records with legacy per-file records that have not been compacted yet."""
+    seen = {r.get("id") for r in log_records}
+    return log_records + [r for r in legacy_records if r.get("id") not in seen]
+
+
+# --- Compaction ---
+def compact(log, legacy_folder="results", delete=False):
+    client = get_client()
+    resp = client.get(log._url(legacy_folder), headers=log.headers)
+    if resp.status_code == 404:
+        return 0
+    resp.raise_for_status()
+    files = [f for f in resp.json() if f["name"].endswith(".json")]
+
+    existing = {r.get("id") for r in log.load()}
+    todo = [f for f in files if record_id(f["name"]) not in existing]
+
+    def fetch(f):
+        data = client.get(f["download_url"], headers=log.headers)
+        data.raise_for_status()
+        return dict(data.json(), id=record_id(f["name"]))
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        records = list(pool.map(fetch, todo))
+    records.sort(key=lambda r: r.get("timestamp", ""))
+    if records:
+        log.append(records, message=f"Compact {len(records)} results into {log.folder}")
+
+    if delete:
+        # Everything listed is now in the log, including files compacted by an earlier run
+        for f in files:
+            payload = {"message": f"Remove compacted {f['name']}", "sha": f["sha"], "branch": log.branch}
+            client.delete(log._url(f"{legacy_folder}/{f['name']}"), headers=log.headers, json=payload)
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the consolidated results log.")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--username", default="limfw")
+    parser.add_argument("--repo", default="sunway")
+    parser.add_argument("--legacy-folder", default="results")
+    parser.add_argument("--log-folder", default=LOG_FOLDER)
+    parser.add_argument("--delete", action="store_true", help="remove per-game files once they are in the log")
+    args = parser.parse_args()
+
+    token = os.environ.get("GITHUB_TOKEN")
+    if not token:
+        parser.error("set GITHUB_TOKEN to a token with contents:write on the repo")
+
+    log = ResultsLog(args.username, args.repo, token, folder=args.log_folder)
+    count = compact(log, legacy_folder=args.legacy_folder, delete=args.delete)
+    print(f"Compacted {count} result files into {args.log_folder}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Adaptive Rock-Paper-Scissors AI, independent of Streamlit.
+
+The round number is passed in explicitly and randomness comes from an
+injectable ``random.Random``, so the same engine runs inside app.py and in
+the headless simulator (simulate.py) with reproducible seeds.
+"""
+import random
+
+import numpy as np
+
+MOVES = ['R', 'P', 'S']
+MOVE_INDEX = {'R': 0, 'P': 1, 'S': 2}
+COUNTER = {'R': 'P', 'P': 'S', 'S': 'R'}
+HISTORY = 10
+
+
+def _context_rules():
+    # Prediction for the last three moves, indexed by 9*m[-3] + 3*m[-2] + m[-1]
+    rules = np.full(27, -1, dtype=np.int8)
+    for m in range(3):
+        rules[13 * m] = m                 # same move three times: expect it again
+    for a, b, c in [(0, 1, 2), (1, 2, 0), (2, 0, 1)]:
+        rules[9 * a + 3 * b + c] = a      # R-P-S style cycle: expect it to restart
+    # A tuple: indexing it is much cheaper than indexing a NumPy array per move
+    return tuple(rules.tolist())
+
+
+CONTEXT_RULES = _context_rules()
+
+
+def determine_winner(ai_move, player_move):
+    if ai_move == player_move:
+        return 'Draw'
+    if (ai_move == 'R' and player_move == 'S') or \
+       (ai_move == 'P' and player_move == 'R') or \
+       (ai_move == 'S' and player_move == 'P'):
+        return 'AI'
+    return 'Player'
+
+
+class RPS_AI:
+    """Moves are stored as 0/1/2 (R/P/S) in fixed-size NumPy arrays, so the
+    model is small, picklable and costs the same per move at any game length.
+    """
+
+    def __init__(self, rng=None, base_randomness=0.2, randomness_decay=0.005,
+                 min_randomness=0.05, counter_noise=0.15):
+        self.rng = rng or random.Random()
+        # Chance of a purely random move: base_randomness - round * randomness_decay, floored
+        self.base_randomness = base_randomness
+        self.randomness_decay = randomness_decay
+        self.min_randomness = min_randomness
+        # Chance of ignoring the prediction when countering it
+        self.counter_noise = counter_noise
+        self.reset()
+
+    def reset(self):
+        self.move_counts = np.ones(3, dtype=np.int32)
+        # Ring buffer of the last HISTORY player moves; history[head - 1] is the latest
+        self.history = np.zeros(HISTORY, dtype=np.int8)
+        self.head = 0
+        self.n_moves = 0
+        self.last_move = -1
+        self.context = 0        # last three moves as a base-3 number
+        self.run_length = 0     # how many times in a row last_move has been played
+        self.learning_rate = 0.2
+        self.transition_counts = np.ones((3, 3), dtype=np.int32)
+        self.transition_cumulative = np.cumsum(self.transition_counts, axis=1, dtype=np.int32)
+        self._bind_views()
+
+    # NumPy scalar indexing costs microseconds; memoryviews over the same buffers
+    # read and write in tens of nanoseconds. They are rebuilt after unpickling.
+    def _bind_views(self):
+        self._counts = memoryview(self.move_counts)
+        self._history = memoryview(self.history)
+        # Flat views: row r, column k of the 3x3 tables is element 3 * r + k
+        self._transitions = memoryview(self.transition_counts.reshape(-1))
+        self._cumulative = memoryview(self.transition_cumulative.reshape(-1))
+
+    # Pickled state leaves out the views and the RNG (~3KB of Mersenne Twister state); a resumed game reseeds
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != "rng" and not isinstance(v, memoryview)}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.rng = random.Random()
+        self._bind_views()
+
+    @property
+    def last_player_moves(self):
+        n = min(self.n_moves, HISTORY)
+        return [MOVES[self._history[(self.head - n + i) % HISTORY]] for i in range(n)]
+
+    def get_move(self, round_no):
+        randomness = max(self.min_randomness, self.base_randomness - (round_no * self.randomness_decay))
+        if self.rng.random() < randomness:
+            return self.rng.choice(MOVES)
+        predicted_move = self._predict_player_move()
+        return self._counter_move(predicted_move)
+
+    def _predict_player_move(self):
+        n = self.n_moves
+        if n >= 4 and self.run_length >= 4:
+            return MOVES[self.last_move]
+        if n >= 3:
+            rule = CONTEXT_RULES[self.context]
+            if rule >= 0:
+                return MOVES[rule]
+        if n >= 1:
+            row = 3 * self.last_move
+            cumulative = self._cumulative
+            c0, c1, total = cumulative[row], cumulative[row + 1], cumulative[row + 2]
+        else:
+            c0 = self._counts[0]
+            c1 = c0 + self._counts[1]
+            total = c1 + self._counts[2]
+        rand = self.rng.uniform(0, total)
+        if rand <= c0:
+            return 'R'
+        return 'P' if rand <= c1 else 'S'
+
+    def _counter_move(self, predicted_move):
+        if self.rng.random() < self.counter_noise:
+            return self.rng.choice(MOVES)
+        return COUNTER[predicted_move]
+
+    def update(self, player_move, result):
+        m = MOVE_INDEX[player_move]
+        self._counts[m] += 1
+        prev = self.last_move
+        if prev >= 0:
+            self._transitions[3 * prev + m] += 1
+            # Bump the running sums from column m onwards
+            cumulative = self._cumulative
+            for k in range(3 * prev + m, 3 * prev + 3):
+                cumulative[k] += 1
+        self.run_length = self.run_length + 1 if prev == m else 1
+        self._history[self.head] = m
+        self.head = (self.head + 1) % HISTORY
+        self.n_moves += 1
+        self.last_move = m
+        self.context = (self.context * 3 + m) % 27
+        if result == 'AI':
+            self.learning_rate = min(0.3, self.learning_rate + 0.02)
+        else:
+            self.learning_rate = max(0.1, self.learning_rate - 0.01)
+
+
+class ContextMixingAI:
+    """Predicts the player from every context length 0..max_order at once.
+
+    Each order keeps move counts per context (the last k player moves, as a
+    base-3 index) in one flat array. Their predictions are mixed with weights
+    that are multiplied by how much probability each order gave the move the
+    player actually made, so orders that have been right dominate.
+    """
+
+    def __init__(self, rng=None, max_order=4, prior=0.5, weight_rate=1.0,
+                 base_randomness=0.2, randomness_decay=0.005, min_randomness=0.05,
+                 counter_noise=0.15):
+        self.rng = rng or random.Random()
+        self.max_order = max_order
+        self.prior = prior
+        self.weight_rate = weight_rate
+        self.base_randomness = base_randomness
+        self.randomness_decay = randomness_decay
+        self.min_randomness = min_randomness
+        self.counter_noise = counter_noise
+        # Row offset of each order's block of 3**k contexts in the flat count table
+        self.offsets = np.cumsum([0] + [3 ** k for k in range(max_order)])
+        self.sizes = np.array([3 ** k for k in range(max_order + 1)])
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros((int(self.offsets[-1] + self.sizes[-1]), 3), dtype=np.float64)
+        self.weights = np.full(self.max_order + 1, 1.0 / (self.max_order + 1))
+        self.context = 0        # last max_order moves, latest in the lowest base-3 digit
+        self.n_moves = 0
+        self._locate()
+
+    # Like RPS_AI, pickled without the RNG; a resumed game reseeds
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != "rng"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.rng = random.Random()
+
+    def _locate(self):
+        # Count-table rows for the current context of every order that has enough history
+        usable = min(self.n_moves, self.max_order) + 1
+        self.rows = (self.offsets + self.context % self.sizes)[:usable]
+
+    def _order_probs(self):
+        counts = self.counts[self.rows] + self.prior
+        return counts / counts.sum(axis=1, keepdims=True)
+
+    def predict(self):
+        """Mixed probability of the player's next move being R, P or S."""
+        weights = self.weights[:len(self.rows)]
+        return weights @ self._order_probs() / weights.sum()
+
+    def get_move(self, round_no):
+        randomness = max(self.min_randomness, self.base_randomness - (round_no * self.randomness_decay))
+        if self.rng.random() < randomness or self.rng.random() < self.counter_noise:
+            return self.rng.choice(MOVES)
+        r, p, s = self.predict().tolist()
+        # Expected score of each AI move: P(player plays what it beats) - P(player plays what beats it)
+        score = [s - p, r - s, p - r]
+        top = max(score)
+        return self.rng.choice([MOVES[a] for a in range(3) if score[a] >= top - 1e-12])
+
+    def update(self, player_move, result):
+        m = MOVE_INDEX[player_move]
+        usable = len(self.rows)
+        hit = self._order_probs()[:, m]
+        self.weights[:usable] *= hit ** self.weight_rate
+        # Floor the weights so an order that fell behind can recover when the player changes style
+        self.weights = np.maximum(self.weights / self.weights.sum(), 1e-6)
+        self.counts[self.rows, m] += 1
+        self.context = (self.context * 3 + m) % int(self.sizes[-1])
+        self.n_moves += 1
+        self._locate()
+
+
+AI_MODES = {
+    "heuristic": RPS_AI,
+    "context_mixing": ContextMixingAI,
+}
+
+
+def make_ai(mode="heuristic", **kwargs):
+    return AI_MODES[mode](**kwargs)
@@ -1,82 +1,62 @@
 import streamlit as st
-import pandas as pd
 import requests
-import base64
-from io import StringIO
 
-# --- GitHub Config ---
-GITHUB_USERNAME = "limfw"
-GITHUB_REPO = "sunway"
-GITHUB_TOKEN = st.secrets["github"]["token"]
-PARTICIPANT_FILE = "participant.csv"
-SCORE_FILE = "manual_scores.csv"
+import events
+import metrics
+import storage
 
-RAW_URL = f"https://raw.githubusercontent.com/{GITHUB_USERNAME}/{GITHUB_REPO}/main/{SCORE_FILE}"
-API_URL = f"https://api.github.com/repos/{GITHUB_USERNAME}/{GITHUB_REPO}/contents/{SCORE_FILE}"
+metrics.serve_from_env()
 
-# Game name mappings
-GAME_NAMES = {
-    "game2": "DodgeBall",
-    "game3": "Captain Ball",
-    "game4": "Graph-Theoretical",
-    "game5": "Topological",
-    "game6": "Logic and Recreation"
-}
+# --- Event: ?event=<key> selects one of the [events] in secrets (see events.py) ---
+try:
+    event = events.get_event(st.secrets, st.query_params.get("event"))
+except events.EventNotFound:
+    event = None
+
+# --- Storage backend (GitHub by default, local directory + SQLite for LAN events) ---
+# Shared by every event (and app) that reads the same repo or directory
+@st.cache_resource
+def get_storage(event_key):
+    return events.get_backend(events.get_event(st.secrets, event_key))
 
 # --- Load Participant Info ---
-@st.cache_data(ttl=60)
-def load_class_list():
-    url = f"https://raw.githubusercontent.com/{GITHUB_USERNAME}/{GITHUB_REPO}/main/{PARTICIPANT_FILE}"
-    df = pd.read_csv(url)
+@metrics.cache_data(ttl=60)
+def load_class_list(event_key):
+    df = get_storage(event_key).load_participants()
     df["Class"] = df["Class"].astype(str).str.strip().str.upper()
     return sorted(df["Class"].unique())
 
-# --- Load Scores from GitHub ---
-@st.cache_data(ttl=60)
-def load_scores():
-    df = pd.read_csv(RAW_URL)
+# --- Load Scores ---
+@metrics.cache_data(ttl=60)
+def load_scores(event_key):
+    df = get_storage(event_key).load_manual_scores()
     df["Class"] = df["Class"].astype(str).str.strip().str.upper()
     return df
 
-# --- GitHub Upload Function ---
-def upload_to_github(updated_df):
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github+json"
-    }
-
-    # Step 1: Get current SHA of file
-    get_resp = requests.get(API_URL, headers=headers)
-    if get_resp.status_code != 200:
-        st.error(f"❌ Failed to fetch file SHA: {get_resp.text}")
-        return False
-
-    sha = get_resp.json()["sha"]
-
-    # Step 2: Prepare content
-    csv_content = updated_df.to_csv(index=False)
-    encoded_content = base64.b64encode(csv_content.encode("utf-8")).decode("utf-8")
-
-    data = {
-        "message": "✅ Update manual_scores.csv via score_entry_app",
-        "content": encoded_content,
-        "branch": "main",
-        "sha": sha
-    }
-
-    # Step 3: PUT request to update file
-    put_resp = requests.put(API_URL, headers=headers, json=data)
-    if put_resp.status_code == 200:
+# --- Upload Function ---
+@metrics.timed("score_upload_seconds")
+def upload_scores(event_key, deltas):
+    # Only the changed (Class, game) cells are sent; the backend merges them into the latest file
+    try:
+        get_storage(event_key).update_manual_scores(deltas)
         return True
-    else:
-        st.error(f"❌ Upload failed: {put_resp.status_code} – {put_resp.text}")
+    except (OSError, requests.RequestException, storage.StorageError) as e:
+        st.error(f"❌ {e}")
         return False
 
 # --- Streamlit UI ---
 st.set_page_config(page_title="Enter Game Scores", layout="centered")
-st.title("🎯 Game Score Entry Portal")
+if event is None:
+    st.error(f"❌ Unknown event: {st.query_params.get('event')}")
+    st.stop()
+GAME_NAMES = event.manual_games
+st.title(f"🎯 {event.title} Game Score Entry Portal" if event.isolated else "🎯 Game Score Entry Portal")
 st.info("Select a game and enter scores for each class.")
 
+if st.query_params.get("debug") == "metrics":
+    metrics.debug_view()
+    st.stop()
+
 # --- Game Selector ---
 game_option = st.selectbox(
     "Select game to enter score:", 
@@ -85,44 +65,46 @@ game_option = st.selectbox(
 )
 
 # --- Load Data ---
-all_classes = load_class_list()
-scores_df = load_scores()
-
-# --- Ensure all classes exist ---
-for c in all_classes:
-    if c not in scores_df["Class"].values:
-        new_row = {"Class": c}
-        for g in range(2, 7):
-            new_row[f"game{g}"] = 0
-        scores_df = pd.concat([scores_df, pd.DataFrame([new_row])], ignore_index=True)
-
-scores_df["Class"] = scores_df["Class"].astype(str).str.strip().str.upper()
-scores_df = scores_df.drop_duplicates("Class").reset_index(drop=True)
+all_classes = load_class_list(event.key)
+scores_df = load_scores(event.key)
+
+# --- Class-keyed score table ---
+# One index over the classes; missing classes (and games) are filled in by a single reindex
+scores = (
+    scores_df.drop_duplicates("Class")
+    .set_index("Class")
+    .reindex(index=all_classes, columns=list(GAME_NAMES))
+    .fillna(0)
+    .astype(int)
+)
+previous_scores = scores[game_option]
 
 # --- Score Entry UI ---
-st.markdown(f"### 📝 Enter scores for {GAME_NAMES[game_option]}")
-updated_scores = {}
-
-for c in all_classes:
-    class_row = scores_df[scores_df["Class"].str.strip().str.upper() == c]
-    if not class_row.empty:
-        prev_score = class_row[game_option].values[0]
-    else:
-        prev_score = 0
-
-    score = st.number_input(
-        f"Team {c} score:",
-        min_value=0, max_value=100, step=1,
-        value=int(prev_score) if pd.notna(prev_score) else 0,
-        key=c
-    )
-    updated_scores[c] = score
+# One form: editing inputs does not rerun the page, everything is submitted together
+with st.form("score_entry"):
+    st.markdown(f"### 📝 Enter scores for {GAME_NAMES[game_option]}")
+    updated_scores = {
+        c: st.number_input(
+            f"Team {c} score:",
+            min_value=0, max_value=100, step=1,
+            value=int(previous_scores[c]),
+            key=c
+        )
+        for c in all_classes
+    }
+    submitted = st.form_submit_button("✅ Submit Scores")
 
-if st.button("✅ Submit Scores"):
-    for c in updated_scores:
-        scores_df.loc[scores_df["Class"] == c, game_option] = updated_scores[c]
+if submitted:
+    deltas = {
+        (c, game_option): score
+        for c, score in updated_scores.items()
+        if score != previous_scores[c]
+    }
 
-    if upload_to_github(scores_df):
-        st.success("✅ Scores updated successfully to GitHub!")
+    if not deltas:
+        st.info("No score changes to submit.")
+    elif upload_scores(event.key, deltas):
+        load_scores.clear()
+        st.success(f"✅ {len(deltas)} score(s) updated successfully!")
     else:
         st.error("❌ Failed to upload scores.")
@@ -0,0 +1,132 @@
+"""Server-side store of in-progress games, keyed by team code.
+
+Each game is kept as one compressed blob: the round history is packed with
+``game_codec`` (half a byte per round plus a latency byte) and the rest
+(aggregates, timer, AI model minus its RNG) is pickled. Entries expire ``ttl`` seconds after their last update
+and the store never holds more than ``max_sessions`` games, evicting the
+least recently updated first. With ``persist_path`` the blobs are also
+written to SQLite so a restarted server can resume games.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import metrics
+from game_codec import decode_game, encode_game
+from rps_ai import determine_winner
+
+def pack_history(history):
+    return encode_game(
+        [h['Player'] for h in history],
+        [h['AI'] for h in history],
+        [h.get('Latency', 0) for h in history]
+    )
+
+
+def unpack_history(packed):
+    players, ais, latencies = decode_game(packed)
+    return [
+        {'Round': i + 1, 'Player': p, 'AI': a, 'Result': determine_winner(a, p), 'Latency': ms}
+        for i, (p, a, ms) in enumerate(zip(players, ais, latencies))
+    ]
+
+
+def encode(state):
+    state = dict(state)
+    if "history" in state:
+        # The codec keeps moves and (log-scaled) latencies; exact move times ride along as-is
+        state["history_at"] = [h.get('At') for h in state["history"]]
+        state["history"] = pack_history(state["history"])
+    return zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def decode(blob):
+    state = pickle.loads(zlib.decompress(blob))
+    if "history" in state:
+        state["history"] = unpack_history(state["history"])
+        for entry, at in zip(state["history"], state.pop("history_at", ())):
+            if at is not None:
+                entry['At'] = at
+    return state
+
+
+class SessionStore:
+    def __init__(self, ttl=900, max_sessions=2000, persist_path=None):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.persist_path = persist_path
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()   # team code -> (expires_at, blob)
+        metrics.set_gauge("game_sessions_live", lambda: self.stats()["live_sessions"])
+        metrics.set_gauge("game_sessions_bytes", lambda: self.stats()["bytes"])
+        if persist_path:
+            directory = os.path.dirname(persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions (team_code TEXT PRIMARY KEY, expires_at REAL, blob BLOB)"
+                )
+                conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+                for code, expires_at, blob in conn.execute("SELECT * FROM sessions ORDER BY expires_at"):
+                    self._sessions[code] = (expires_at, blob)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.persist_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _evict(self, now):
+        expired = [code for code, (expires_at, _) in self._sessions.items() if expires_at < now]
+        for code in expired:
+            del self._sessions[code]
+        while len(self._sessions) > self.max_sessions:
+            expired.append(self._sessions.popitem(last=False)[0])
+        if expired and self.persist_path:
+            with self._connect() as conn:
+                conn.executemany("DELETE FROM sessions WHERE team_code = ?", [(c,) for c in expired])
+
+    def put(self, team_code, state):
+        blob = encode(state)
+        now = time.time()
+        with self._lock:
+            self._sessions[team_code] = (now + self.ttl, blob)
+            self._sessions.move_to_end(team_code)
+            self._evict(now)
+        if self.persist_path:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", (team_code, now + self.ttl, blob))
+
+    def get(self, team_code):
+        with self._lock:
+            entry = self._sessions.get(team_code)
+        if entry is None or entry[0] < time.time():
+            return None
+        return decode(entry[1])
+
+    def discard(self, team_code):
+        with self._lock:
+            self._sessions.pop(team_code, None)
+        if self.persist_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM sessions WHERE team_code = ?", (team_code,))
+
+    def stats(self):
+        with self._lock:
+            self._evict(time.time())
+            return {
+                "live_sessions": len(self._sessions),
+                "bytes": sum(len(blob) for _, blob in self._sessions.values()),
+            }
+
+    def __len__(self):
+        return self.stats()["live_sessions"]
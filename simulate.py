@@ -0,0 +1,240 @@
+"""Headless batch simulator for the RPS AI.
+
+Plays many seeded games of the AI against scripted opponents in a process
+pool and reports how often the AI wins and how per-move latency behaves over
+the course of a game.
+
+    python simulate.py --games 100000 --workers 8 --seed 1
+    python simulate.py --strategy cyclic --counter-noise 0.1 --min-randomness 0.02
+    python simulate.py --ai context_mixing --max-order 5
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game_codec import decode_games
+from rps_ai import AI_MODES, COUNTER, MOVES, determine_winner, make_ai
+
+ROUNDS = 60
+
+
+# --- Scripted opponents ---
+class CyclicStrategy:
+    def __init__(self, rng, cycle="RPS"):
+        self.cycle = cycle
+        self.offset = rng.randrange(len(cycle))
+
+    def next_move(self, history):
+        return self.cycle[(len(history) + self.offset) % len(self.cycle)]
+
+
+class BiasedStrategy:
+    def __init__(self, rng, weights=None):
+        self.rng = rng
+        # A random favourite move, played about half of the time
+        self.weights = weights or rng.sample([0.5, 0.3, 0.2], 3)
+
+    def next_move(self, history):
+        return self.rng.choices(MOVES, weights=self.weights)[0]
+
+
+class FrequencyCounterStrategy:
+    """Counters whatever the AI has played most often so far."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.ai_counts = {'R': 0, 'P': 0, 'S': 0}
+
+    def next_move(self, history):
+        if history:
+            self.ai_counts[history[-1][1]] += 1
+        if not any(self.ai_counts.values()):
+            return self.rng.choice(MOVES)
+        return COUNTER[max(self.ai_counts, key=self.ai_counts.get)]
+
+
+class RandomStrategy:
+    def __init__(self, rng):
+        self.rng = rng
+
+    def next_move(self, history):
+        return self.rng.choice(MOVES)
+
+
+class ReplayStrategy:
+    """Replays a recorded human game, falling back to random moves once it runs out."""
+
+    def __init__(self, rng, replays):
+        self.rng = rng
+        self.moves = rng.choice(replays) if replays else ""
+
+    def next_move(self, history):
+        if len(history) < len(self.moves):
+            return self.moves[len(history)]
+        return self.rng.choice(MOVES)
+
+
+STRATEGIES = {
+    "cyclic": lambda rng, replays: CyclicStrategy(rng),
+    "biased": lambda rng, replays: BiasedStrategy(rng),
+    "counter": lambda rng, replays: FrequencyCounterStrategy(rng),
+    "random": lambda rng, replays: RandomStrategy(rng),
+    "replay": lambda rng, replays: ReplayStrategy(rng, replays),
+}
+
+
+def load_replays(folder="results"):
+    """Player move strings (e.g. ``"RPSSR..."``) from result files that recorded the full game."""
+    if not os.path.isdir(folder):
+        return []
+    games, replays = [], []
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(folder, name), encoding="utf-8") as f:
+            record = json.load(f)
+        if record.get("game"):
+            games.append(record["game"])
+        elif record.get("moves"):
+            replays.append(record["moves"])
+    if games:
+        decoded = decode_games(games)
+        for row, rounds in zip(decoded["players"], decoded["rounds"]):
+            replays.append("".join(MOVES[m] for m in row[:rounds]))
+    return replays
+
+
+# --- One game / one chunk of games ---
+def play_game(ai, opponent, rounds=ROUNDS, latencies=None):
+    stats = {'AI': 0, 'Player': 0, 'Draw': 0}
+    history = []
+    for round_no in range(1, rounds + 1):
+        player_move = opponent.next_move(history)
+        start = time.perf_counter_ns()
+        ai_move = ai.get_move(round_no)
+        result = determine_winner(ai_move, player_move)
+        ai.update(player_move, result)
+        if latencies is not None:
+            latencies[round_no - 1] += time.perf_counter_ns() - start
+        stats[result] += 1
+        history.append((player_move, ai_move))
+    return stats
+
+
+def run_chunk(strategy, games, seed, rounds=ROUNDS, ai_params=None, replays=None, ai_mode="heuristic"):
+    totals = {
+        "games": 0, "ai_games": 0, "player_games": 0, "tied_games": 0,
+        "AI": 0, "Player": 0, "Draw": 0,
+        "latency_ns": [0] * rounds
+    }
+    for i in range(games):
+        ai = make_ai(ai_mode, rng=random.Random(f"{seed}:ai:{i}"), **(ai_params or {}))
+        opponent = STRATEGIES[strategy](random.Random(f"{seed}:opponent:{i}"), replays)
+        stats = play_game(ai, opponent, rounds, totals["latency_ns"])
+        totals["games"] += 1
+        for key in ['AI', 'Player', 'Draw']:
+            totals[key] += stats[key]
+        if stats['AI'] > stats['Player']:
+            totals["ai_games"] += 1
+        elif stats['Player'] > stats['AI']:
+            totals["player_games"] += 1
+        else:
+            totals["tied_games"] += 1
+    return totals
+
+
+def merge_totals(parts):
+    merged = None
+    for part in parts:
+        if merged is None:
+            merged = dict(part, latency_ns=list(part["latency_ns"]))
+            continue
+        for key, value in part.items():
+            if key == "latency_ns":
+                merged[key] = [a + b for a, b in zip(merged[key], value)]
+            else:
+                merged[key] += value
+    return merged
+
+
+def simulate(strategy, games, seed=0, workers=None, rounds=ROUNDS, ai_params=None, replays=None,
+             ai_mode="heuristic", chunk_size=2000):
+    """Play ``games`` seeded games against one strategy, spread over a process pool."""
+    chunks = [(i, min(chunk_size, games - start)) for i, start in enumerate(range(0, games, chunk_size))]
+    args = [(strategy, n, f"{seed}:{strategy}:{i}", rounds, ai_params, replays, ai_mode) for i, n in chunks]
+    if workers == 1:
+        return merge_totals(run_chunk(*a) for a in args)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge_totals(pool.map(run_chunk, *zip(*args)))
+
+
+def summarize(strategy, totals):
+    games = totals["games"]
+    rounds = len(totals["latency_ns"])
+    latency = [ns / games / 1000 for ns in totals["latency_ns"]]
+    tenth = max(1, rounds // 10)
+    return {
+        "strategy": strategy,
+        "games": games,
+        "ai_game_win_rate": totals["ai_games"] / games,
+        "player_game_win_rate": totals["player_games"] / games,
+        "ai_round_share": totals["AI"] / (games * rounds),
+        "player_round_share": totals["Player"] / (games * rounds),
+        "move_us_mean": sum(latency) / rounds,
+        "move_us_first_10pct": sum(latency[:tenth]) / tenth,
+        "move_us_last_10pct": sum(latency[-tenth:]) / tenth,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the RPS AI against scripted opponents.")
+    parser.add_argument("--strategy", choices=["all", *STRATEGIES], default="all")
+    parser.add_argument("--ai", choices=list(AI_MODES), default="heuristic", help="AI mode to evaluate")
+    parser.add_argument("--games", type=int, default=10000, help="games per strategy")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--results", default="results", help="folder of result files to replay")
+    parser.add_argument("--base-randomness", type=float, default=0.2)
+    parser.add_argument("--randomness-decay", type=float, default=0.005)
+    parser.add_argument("--min-randomness", type=float, default=0.05)
+    parser.add_argument("--counter-noise", type=float, default=0.15)
+    parser.add_argument("--max-order", type=int, default=4, help="longest context (context_mixing only)")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per strategy")
+    args = parser.parse_args()
+
+    ai_params = {
+        "base_randomness": args.base_randomness,
+        "randomness_decay": args.randomness_decay,
+        "min_randomness": args.min_randomness,
+        "counter_noise": args.counter_noise,
+    }
+    if args.ai == "context_mixing":
+        ai_params["max_order"] = args.max_order
+    replays = load_replays(args.results)
+    strategies = list(STRATEGIES) if args.strategy == "all" else [args.strategy]
+    for strategy in strategies:
+        if strategy == "replay" and not replays:
+            print(f"replay: no recorded move histories in {args.results}/, skipped")
+            continue
+        started = time.perf_counter()
+        totals = simulate(strategy, args.games, args.seed, args.workers, args.rounds, ai_params, replays, args.ai)
+        summary = summarize(strategy, totals)
+        summary["seconds"] = time.perf_counter() - started
+        if args.json:
+            print(json.dumps(summary))
+        else:
+            print(
+                f"{strategy:>8}: AI wins {summary['ai_game_win_rate']:.1%} of {summary['games']} games "
+                f"({summary['ai_round_share']:.1%} of rounds), "
+                f"move {summary['move_us_mean']:.1f}µs "
+                f"[first 10% {summary['move_us_first_10pct']:.1f}µs, last 10% {summary['move_us_last_10pct']:.1f}µs] "
+                f"in {summary['seconds']:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
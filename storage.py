@@ -0,0 +1,366 @@
+"""Storage backends for the four datasets the apps share.
+
+- team codes (``team_code.csv``)
+- participants (``participant.csv``: team_code -> Class)
+- game results (one record per finished game)
+- manual scores (``manual_scores.csv``: Class x game2..game6)
+
+``GitHubBackend`` keeps everything in the GitHub repo as before.
+``LocalBackend`` reads the CSVs from a directory and keeps results in SQLite,
+for running an event on a LAN box or load-testing without GitHub.
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+from github_client import backoff_delay, get_client
+from results_ingest import CACHE_PATH, ResultsCache
+from results_log import LOG_FOLDER, ResultsLog, merge_with_legacy
+from team_index import UsedTeamCodes
+
+TEAM_CODE_FILE = "team_code.csv"
+PARTICIPANT_FILE = "participant.csv"
+MANUAL_SCORE_FILE = "manual_scores.csv"
+RESULTS_FOLDER = "results"
+MAX_WRITE_ATTEMPTS = 5
+DATASETS = ("participants", "results", "manual_scores")
+
+
+class StorageError(Exception):
+    pass
+
+
+def new_result_id(team_code):
+    return f"{team_code}_{uuid.uuid4().hex}"
+
+
+def parse_team_codes(text):
+    return [c.strip() for c in text.lstrip("\ufeff").strip().splitlines() if c.strip()]
+
+
+def apply_score_deltas(scores_df, deltas):
+    """Return a copy of the manual scores with ``{(Class, game): score}`` applied.
+
+    Classes or game columns that do not exist yet are added with 0 elsewhere.
+    """
+    df = scores_df.copy()
+    df["Class"] = df["Class"].astype(str).str.strip().str.upper()
+    df = df.drop_duplicates("Class").set_index("Class")
+    for (class_name, game), score in deltas.items():
+        df.loc[class_name, game] = score
+    game_cols = [c for c in df.columns if str(c).startswith("game")]
+    df[game_cols] = df[game_cols].fillna(0).astype(int)
+    return df.reset_index()
+
+
+# --- Interface ---
+class StorageBackend:
+    def load_team_codes(self):
+        raise NotImplementedError
+
+    def load_participants(self):
+        raise NotImplementedError
+
+    def load_results(self):
+        raise NotImplementedError
+
+    def is_team_code_used(self, team_code):
+        raise NotImplementedError
+
+    def save_result(self, record):
+        """Persist one finished game and return a link/location for it.
+
+        Saving a record whose ``id`` is already stored must succeed without
+        storing it twice, so callers can retry safely.
+        """
+        raise NotImplementedError
+
+    def load_manual_scores(self):
+        raise NotImplementedError
+
+    def update_manual_scores(self, deltas):
+        """Merge ``{(Class, game): score}`` into the latest stored manual scores."""
+        raise NotImplementedError
+
+    def dataset_version(self, dataset):
+        """A cheap fingerprint of one of ``DATASETS`` that changes whenever its contents do."""
+        raise NotImplementedError
+
+
+# --- GitHub repository ---
+class GitHubBackend(StorageBackend):
+    def __init__(self, username, repo, token, folder=RESULTS_FOLDER, log_folder=LOG_FOLDER,
+                 results_storage="files", branch="main", results_cache_path=CACHE_PATH):
+        self.username = username
+        self.repo = repo
+        self.token = token
+        self.folder = folder
+        self.branch = branch
+        # "files" keeps one JSON per game in results/, "log" appends to the segmented log
+        self.results_storage = results_storage
+        self.results_cache = ResultsCache(results_cache_path)
+        self.results_log = ResultsLog(username, repo, token, folder=log_folder, branch=branch)
+        self.used_codes = UsedTeamCodes(username, repo, token, folder, log=self.results_log)
+
+    @property
+    def headers(self):
+        return {
+            "Authorization": f"Bearer {self.token}",
+            "Accept": "application/vnd.github+json"
+        }
+
+    def _contents_url(self, path):
+        return f"https://api.github.com/repos/{self.username}/{self.repo}/contents/{path}"
+
+    def _raw_url(self, path):
+        return f"https://raw.githubusercontent.com/{self.username}/{self.repo}/{self.branch}/{path}"
+
+    def _get_raw(self, path):
+        resp = get_client().get(self._raw_url(path), headers=self.headers)
+        if resp.status_code != 200:
+            raise StorageError(f"Could not load {path}: {resp.status_code}")
+        return resp.content.decode("utf-8-sig")
+
+    def load_team_codes(self):
+        return parse_team_codes(self._get_raw(TEAM_CODE_FILE))
+
+    def load_participants(self):
+        return pd.read_csv(io.StringIO(self._get_raw(PARTICIPANT_FILE)))
+
+    def load_results(self):
+        resp = get_client().get(self._contents_url(self.folder), headers=self.headers)
+        legacy = []
+        if resp.status_code == 200:
+            # Only files not seen before (by name and blob SHA) are downloaded
+            legacy = self.results_cache.sync(resp.json(), self.headers)
+        # Consolidated log first; per-game files still count until they are compacted
+        return merge_with_legacy(self.results_log.load(), legacy)
+
+    def is_team_code_used(self, team_code):
+        return self.used_codes.is_used(team_code)
+
+    def save_result(self, record):
+        record = dict(record)
+        record_id = record.pop("id", None) or new_result_id(record["team_code"])
+        message = f"Save result for team {record['team_code']}"
+
+        if self.results_storage == "log":
+            # A retried save must not append the same result twice
+            if any(r.get("id") == record_id for r in self.results_log.load()):
+                self.used_codes.add(record["team_code"])
+                return self.results_log.file_url(self.results_log.list_segments()[-1]["name"])
+            segment = self.results_log.append([dict(record, id=record_id)], message=message)
+            self.used_codes.add(record["team_code"])
+            return self.results_log.file_url(segment)
+
+        filepath = f"{self.folder}/{record_id}.json"
+        payload = {
+            "message": message,
+            "content": base64.b64encode(json.dumps(record, indent=2).encode()).decode()
+        }
+        put_resp = get_client().put(self._contents_url(filepath), headers=self.headers, json=payload)
+        if put_resp.status_code == 422:
+            # Creating a file that already exists: an earlier attempt of this save went through
+            existing = get_client().get(self._contents_url(filepath), headers=self.headers, conditional=False)
+            if existing.status_code == 200:
+                put_resp = existing
+        if put_resp.status_code not in [200, 201]:
+            raise StorageError(f"GitHub upload failed: {put_resp.status_code} — {put_resp.text}")
+        self.used_codes.add(record["team_code"])
+        return f"https://github.com/{self.username}/{self.repo}/blob/{self.branch}/{filepath}"
+
+    def load_manual_scores(self):
+        resp = get_client().get(self._contents_url(MANUAL_SCORE_FILE), headers=self.headers)
+        if resp.status_code != 200:
+            raise StorageError(f"Failed to load {MANUAL_SCORE_FILE}: {resp.status_code}")
+        decoded = base64.b64decode(resp.json()["content"])
+        return pd.read_csv(io.StringIO(decoded.decode()))
+
+    def update_manual_scores(self, deltas):
+        url = self._contents_url(MANUAL_SCORE_FILE)
+        for attempt in range(MAX_WRITE_ATTEMPTS):
+            # Re-read the latest version so other judges' cells are kept
+            get_resp = get_client().get(url, headers=self.headers)
+            if get_resp.status_code != 200:
+                raise StorageError(f"Failed to fetch file SHA: {get_resp.text}")
+            body = get_resp.json()
+            current = pd.read_csv(io.StringIO(base64.b64decode(body["content"]).decode("utf-8-sig")))
+            merged = apply_score_deltas(current, deltas)
+
+            data = {
+                "message": f"✅ Update {len(deltas)} score(s) in {MANUAL_SCORE_FILE} via score_entry_app",
+                "content": base64.b64encode(merged.to_csv(index=False).encode("utf-8")).decode("utf-8"),
+                "branch": self.branch,
+                "sha": body["sha"]
+            }
+            put_resp = get_client().put(url, headers=self.headers, json=data)
+            if put_resp.status_code in [200, 201]:
+                return merged
+            if put_resp.status_code not in [409, 422]:
+                raise StorageError(f"Upload failed: {put_resp.status_code} – {put_resp.text}")
+            # Stale SHA: another judge saved in between, merge again on top of theirs
+            time.sleep(backoff_delay(attempt))
+        raise StorageError(f"Upload failed: {MANUAL_SCORE_FILE} kept changing, gave up after {MAX_WRITE_ATTEMPTS} attempts")
+
+    def _fingerprint(self, url):
+        # Conditional GET: an unchanged file or listing is a 304, which GitHub does not rate-limit
+        resp = get_client().get(url, headers=self.headers)
+        if resp.status_code == 404:
+            return None
+        if resp.status_code != 200:
+            raise StorageError(f"Could not check {url}: {resp.status_code}")
+        return resp.headers.get("ETag") or hashlib.sha1(resp.content).hexdigest()
+
+    def dataset_version(self, dataset):
+        if dataset == "participants":
+            return self._fingerprint(self._raw_url(PARTICIPANT_FILE))
+        if dataset == "manual_scores":
+            return self._fingerprint(self._contents_url(MANUAL_SCORE_FILE))
+        if dataset == "results":
+            return (self._fingerprint(self._contents_url(self.folder)),
+                    self._fingerprint(self._contents_url(self.results_log.folder)))
+        raise ValueError(f"unknown dataset {dataset!r}")
+
+
+# --- Local directory + SQLite ---
+class LocalBackend(StorageBackend):
+    def __init__(self, root=".", db_name="results.db"):
+        self.root = root
+        self.db_path = os.path.join(root, db_name)
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " id TEXT PRIMARY KEY, team_code TEXT NOT NULL, timestamp TEXT, win INTEGER, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_team_code ON results (team_code)")
+        self.import_result_files(os.path.join(root, RESULTS_FOLDER))
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across Streamlit's script threads
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def import_result_files(self, folder):
+        """Load legacy per-game JSON files into the results table (idempotent)."""
+        if not os.path.isdir(folder):
+            return 0
+        records = []
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".json"):
+                with open(os.path.join(folder, name), encoding="utf-8") as f:
+                    records.append(dict(json.load(f), id=name[:-len(".json")]))
+        return self.import_records(records)
+
+    def import_records(self, records):
+        """Bulk-insert result records (each with an ``id``); ids already stored are skipped."""
+        rows = []
+        for record in records:
+            record = dict(record)
+            rows.append(self._row(record.pop("id"), record))
+        with self._write_lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+
+    @staticmethod
+    def _row(record_id, record):
+        return (record_id, record["team_code"], record.get("timestamp"), record.get("win"), json.dumps(record))
+
+    def load_team_codes(self):
+        with open(self._path(TEAM_CODE_FILE), encoding="utf-8-sig") as f:
+            return parse_team_codes(f.read())
+
+    def load_participants(self):
+        return pd.read_csv(self._path(PARTICIPANT_FILE), encoding="utf-8-sig")
+
+    def load_results(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, data FROM results ORDER BY rowid").fetchall()
+        return [dict(json.loads(data), id=record_id) for record_id, data in rows]
+
+    def is_team_code_used(self, team_code):
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM results WHERE team_code = ? LIMIT 1", (team_code,)).fetchone()
+        return row is not None
+
+    def save_result(self, record):
+        record = dict(record)
+        record_id = record.pop("id", None) or new_result_id(record["team_code"])
+        with self._write_lock, self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?)", self._row(record_id, record))
+        return f"{self.db_path}#{record_id}"
+
+    def load_manual_scores(self):
+        try:
+            return pd.read_csv(self._path(MANUAL_SCORE_FILE), encoding="utf-8-sig")
+        except FileNotFoundError:
+            raise StorageError(f"Failed to load {MANUAL_SCORE_FILE}: not found in {self.root}")
+
+    def update_manual_scores(self, deltas):
+        path = self._path(MANUAL_SCORE_FILE)
+        with self._write_lock:
+            merged = apply_score_deltas(self.load_manual_scores(), deltas)
+            merged.to_csv(f"{path}.tmp", index=False)
+            os.replace(f"{path}.tmp", path)
+        return merged
+
+    def dataset_version(self, dataset):
+        if dataset == "results":
+            with self._connect() as conn:
+                return conn.execute("SELECT COUNT(*), MAX(rowid) FROM results").fetchone()
+        if dataset in ("participants", "manual_scores"):
+            name = PARTICIPANT_FILE if dataset == "participants" else MANUAL_SCORE_FILE
+            try:
+                stat = os.stat(self._path(name))
+            except FileNotFoundError:
+                return None
+            return stat.st_mtime_ns, stat.st_size
+        raise ValueError(f"unknown dataset {dataset!r}")
+
+
+# --- Factory ---
+def from_config(secrets, use_env=True, **github_overrides):
+    """Build a backend from Streamlit secrets.
+
+    ``[storage] backend = "local"`` (or ``RPS_STORAGE=local``) selects the
+    local backend rooted at ``[storage] path`` / ``RPS_DATA_DIR``; anything
+    else uses the ``[github]`` section. ``use_env=False`` ignores the
+    ``RPS_*`` overrides (each event in ``events.py`` has its own location).
+    """
+    settings = dict(secrets.get("storage", {}))
+    env = os.environ if use_env else {}
+    kind = env.get("RPS_STORAGE", settings.get("backend", "github"))
+    if kind == "local":
+        return LocalBackend(env.get("RPS_DATA_DIR", settings.get("path", ".")))
+
+    github = dict(secrets.get("github", {}))
+    github.update(github_overrides)
+    return GitHubBackend(
+        github["username"],
+        github["repo"],
+        github["token"],
+        folder=github.get("folder", RESULTS_FOLDER),
+        log_folder=github.get("log_folder", LOG_FOLDER),
+        results_storage=github.get("results_storage", "files"),
+        branch=github.get("branch", "main"),
+        results_cache_path=github.get("cache_path", CACHE_PATH)
+    )
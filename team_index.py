@@ -0,0 +1,79 @@
+"""In-process index of team codes that already have a saved result.
+
+Lookups hit a set; on a miss the index is revalidated against GitHub with
+conditional requests (If-None-Match), which come back as cheap 304s when
+neither the results folder nor the results log has changed.
+"""
+import threading
+import time
+
+from github_client import get_client
+
+
+def team_code_from_filename(name):
+    # Legacy result files are named {team_code}_{uuid}.json
+    if not name.endswith(".json") or "_" not in name:
+        return None
+    return name.rsplit("_", 1)[0]
+
+
+class UsedTeamCodes:
+    def __init__(self, username, repo, token, folder, log=None):
+        self.url = f"https://api.github.com/repos/{username}/{repo}/contents/{folder}"
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.log = log
+        self._lock = threading.Lock()
+        self._file_codes = set()
+        self._log_codes = set()
+        self._local_codes = set()
+        self._etags = {}   # url -> ETag of the listing the codes were built from
+        self._revalidated_at = 0.0
+
+    def _conditional_get(self, url):
+        # The shared client sends If-None-Match, but its cache is shared with every other reader
+        # of the listing: a 304 there only means "unchanged since someone looked". Compare the
+        # ETag with the last one this index built from instead; None means unchanged.
+        resp = get_client().get(url, headers=self.headers)
+        if resp.status_code == 404:
+            self._etags.pop(url, None)
+            return []
+        resp.raise_for_status()
+        etag = resp.headers.get("ETag")
+        if etag is not None and self._etags.get(url) == etag:
+            return None
+        self._etags[url] = etag
+        return resp.json()
+
+    def revalidate(self):
+        started = time.monotonic()
+        with self._lock:
+            # Another session refreshed while we waited for the lock; reuse its answer
+            if self._revalidated_at >= started:
+                return
+            files = self._conditional_get(self.url)
+            if files is not None:
+                self._file_codes = {
+                    code for code in (team_code_from_filename(f["name"]) for f in files) if code
+                }
+            if self.log is not None:
+                segments = self._conditional_get(self.log._url(self.log.folder))
+                if segments is not None:
+                    self._log_codes = {r.get("team_code") for r in self.log.load()}
+            self._revalidated_at = time.monotonic()
+
+    def __contains__(self, team_code):
+        return (
+            team_code in self._local_codes
+            or team_code in self._file_codes
+            or team_code in self._log_codes
+        )
+
+    def is_used(self, team_code):
+        if team_code in self:
+            return True
+        self.revalidate()
+        return team_code in self
+
+    def add(self, team_code):
+        with self._lock:
+            self._local_codes.add(team_code)
@@ -0,0 +1,87 @@
+"""Process-wide registry of valid team codes and their classes.
+
+Codes are kept in a frozenset normalized the same way as the leaderboard
+(stripped, upper-case), next to a code -> Class mapping joined from the
+participant list. The first lookup loads synchronously; after that a lookup
+never waits on the network: once the data is ``refresh_after`` seconds old
+one background thread reloads it while readers keep using the current copy
+(stale-while-revalidate).
+"""
+import threading
+import time
+
+import metrics
+
+REFRESH_AFTER = 60
+
+
+def normalize_code(code):
+    return str(code).strip().upper()
+
+
+class TeamRegistry:
+    def __init__(self, backend, refresh_after=REFRESH_AFTER):
+        self.backend = backend
+        self.refresh_after = refresh_after
+        self._load_lock = threading.Lock()
+        self._refreshing = threading.Event()
+        # (normalized codes, normalized -> code as written in team_code.csv, normalized -> Class, loaded at)
+        self._state = None
+        metrics.set_gauge("team_registry_age_seconds", self.age)
+
+    def _load(self):
+        codes = self.backend.load_team_codes()
+        canonical = {normalize_code(c): c.strip() for c in codes}
+        try:
+            participants = self.backend.load_participants()
+            classes = dict(zip(
+                participants["team_code"].map(normalize_code),
+                participants["Class"].astype(str).str.strip()
+            ))
+        except Exception:
+            # The Class is only informational at login; never block valid codes on it
+            # (a missing sheet or one with other headers just means no Class is shown)
+            classes = {}
+        metrics.count("team_registry_loads_total")
+        self._state = (frozenset(canonical), canonical, classes, time.monotonic())
+
+    def _refresh_in_background(self):
+        try:
+            self._load()
+        except Exception:
+            # Keep serving the last good copy; the next lookup schedules another try
+            metrics.count("team_registry_errors_total")
+        finally:
+            self._refreshing.clear()
+
+    def _current(self):
+        state = self._state
+        if state is None:
+            with self._load_lock:
+                # Single flight: sessions that queued behind the first load reuse it
+                if self._state is None:
+                    self._load()
+                state = self._state
+        elif time.monotonic() - state[3] > self.refresh_after and not self._refreshing.is_set():
+            with self._load_lock:
+                if not self._refreshing.is_set():
+                    self._refreshing.set()
+                    threading.Thread(target=self._refresh_in_background, name="team-registry", daemon=True).start()
+        return state
+
+    def age(self):
+        state = self._state
+        return 0.0 if state is None else time.monotonic() - state[3]
+
+    def __contains__(self, code):
+        return normalize_code(code) in self._current()[0]
+
+    def __len__(self):
+        return len(self._current()[0])
+
+    def canonical(self, code):
+        """The code as written in team_code.csv, or None if it is not a valid code."""
+        return self._current()[1].get(normalize_code(code))
+
+    def class_of(self, code):
+        return self._current()[2].get(normalize_code(code))
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The apps are flat top-level modules; make them importable when running plain `pytest`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+"""parse_batch must keep every good record of a batch and drop only the bad ones."""
+import json
+from datetime import datetime
+
+from analyze_results import parse_batch
+
+
+def record(record_id, **fields):
+    return record_id, json.dumps({"team_code": "ALPHA", "timestamp": "2024-01-01T10:00:00", "win": 1, **fields}).encode()
+
+
+def test_mixed_iso_timestamps_all_parse():
+    # isoformat() drops the fraction when the microsecond is 0
+    batch = [
+        record("a", timestamp=datetime(2024, 1, 1, 10).isoformat()),
+        record("b", timestamp=datetime(2024, 1, 1, 10, 0, 0, 123456).isoformat()),
+    ]
+    table = parse_batch(batch).to_pandas()
+    assert table["timestamp"].notna().all()
+
+
+def test_bad_records_are_skipped():
+    batch = [record("a"), record("b", win=None), record("c", win="x"), ("d", b"{not json"), record("e", win=0)]
+    table = parse_batch(batch).to_pandas()
+    assert table["id"].tolist() == ["a", "e"]
+    assert table["win"].tolist() == [1, 0]
@@ -0,0 +1,52 @@
+"""The incremental leaderboard must always match a build from scratch."""
+import pandas as pd
+import pytest
+
+from leaderboard import RPS_COL, TeamLeaderboard
+
+PARTICIPANTS = pd.DataFrame({"team_code": ["a1", "a2", "b1"], "Class": ["Alpha", "Alpha", "Bravo"]})
+SCORES = pd.DataFrame({"Class": ["ALPHA", "BRAVO"], "game2": [0, 0]})
+
+
+def results(*rows):
+    return pd.DataFrame([{"id": i, "team_code": code, "win": win} for i, code, win in rows],
+                        columns=["id", "team_code", "win"])
+
+
+def rps_wins(table):
+    return dict(zip(table["Class"], table[RPS_COL]))
+
+
+def check(board, frame):
+    incremental = rps_wins(board.build(frame, PARTICIPANTS, SCORES))
+    assert incremental == rps_wins(TeamLeaderboard().build(frame.copy(), PARTICIPANTS, SCORES))
+    return incremental
+
+
+@pytest.fixture
+def board():
+    board = TeamLeaderboard()
+    assert check(board, results(("x", "a1", 1), ("y", "a1", 1))) == {"ALPHA": 2, "BRAVO": 0}
+    return board
+
+
+def test_appended_results_are_added(board):
+    frame = results(("x", "a1", 1), ("y", "a1", 1), ("z", "b1", 1), ("w", "a2", 0))
+    assert check(board, frame) == {"ALPHA": 2, "BRAVO": 1}
+
+
+def test_deleted_result_is_subtracted(board):
+    assert check(board, results(("x", "a1", 1))) == {"ALPHA": 1, "BRAVO": 0}
+
+
+def test_edited_win_is_recounted(board):
+    assert check(board, results(("x", "a1", 1), ("y", "a1", 0))) == {"ALPHA": 1, "BRAVO": 0}
+
+
+def test_duplicate_ids_count_once(board):
+    frame = results(("x", "a1", 1), ("y", "a1", 1), ("z", "b1", 1), ("z", "b1", 1), ("y", "a1", 1))
+    assert check(board, frame) == {"ALPHA": 2, "BRAVO": 1}
+
+
+def test_all_results_removed(board):
+    assert check(board, results()) == {"ALPHA": 0, "BRAVO": 0}
@@ -0,0 +1,73 @@
+"""A queued result is saved exactly once, even when GitHub's response is lost."""
+import pytest
+
+import github_client
+import results_log
+import storage
+from loadtest import STUB_REPO, STUB_USER, GitHubStub
+from result_queue import ResultQueue
+
+RECORD = {"id": "a1_x", "team_code": "a1", "timestamp": "2025-07-05T03:00:00", "win": 1}
+
+
+class LossyStub(GitHubStub):
+    """Applies PUTs but answers the first ``lose`` of them with a 502, as if the response was lost."""
+
+    def __init__(self, lose):
+        super().__init__({})
+        self.lose = lose
+
+    def _put(self, path, payload):
+        resp = super()._put(path, payload)
+        if self.lose:
+            self.lose -= 1
+            return self._response(502, {"message": "Bad Gateway"})
+        return resp
+
+
+@pytest.fixture
+def github(monkeypatch, tmp_path):
+    def make(lose, results_storage):
+        client = github_client.GitHubClient()
+        client.session = LossyStub(lose)
+        monkeypatch.setattr(github_client, "_client", client)
+        monkeypatch.setattr(github_client.time, "sleep", lambda seconds: None)
+        monkeypatch.setattr(results_log.time, "sleep", lambda seconds: None)
+        backend = storage.GitHubBackend(STUB_USER, STUB_REPO, "token", results_storage=results_storage,
+                                        results_cache_path=str(tmp_path / "results_cache.json"))
+        return backend, client.session
+    return make
+
+
+def saved_ids(backend, stub):
+    if backend.results_storage == "log":
+        return [r["id"] for r in backend.results_log.load()]
+    return [path.rsplit("/", 1)[-1][:-len(".json")] for path in stub.files if path.startswith("results/")]
+
+
+@pytest.mark.parametrize("results_storage", ["log", "files"])
+def test_lost_response_retried_by_client(github, tmp_path, results_storage):
+    # First PUT is committed but answered with a 502; the client's own retry then conflicts
+    backend, stub = github(lose=1, results_storage=results_storage)
+    queue = ResultQueue(backend, path=str(tmp_path / "journal.db"), start=False)
+    queue.enqueue(dict(RECORD))
+    queue.drain()
+    assert queue.pending_count() == 0
+    assert saved_ids(backend, stub) == ["a1_x"]
+
+
+@pytest.mark.parametrize("results_storage", ["log", "files"])
+def test_lost_response_replayed_from_journal(github, tmp_path, results_storage):
+    # Every attempt of the first save loses its response, so the record stays queued and is replayed
+    backend, stub = github(lose=github_client.MAX_RETRIES + 1, results_storage=results_storage)
+    queue = ResultQueue(backend, path=str(tmp_path / "journal.db"), start=False)
+    queue.enqueue(dict(RECORD))
+    queue.drain()
+    assert queue.pending_count() == 1
+
+    with queue._connect() as conn:
+        conn.execute("UPDATE pending SET next_attempt = 0")
+    queue.drain()
+    assert queue.pending_count() == 0
+    assert saved_ids(backend, stub) == ["a1_x"]
+    assert backend.is_team_code_used("a1")
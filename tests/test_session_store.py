@@ -0,0 +1,23 @@
+"""A game saved to the session store resumes with the same AI model."""
+import random
+
+import pytest
+
+import session_store
+from rps_ai import MOVES, ContextMixingAI, RPS_AI, determine_winner
+
+
+@pytest.mark.parametrize("cls", [RPS_AI, ContextMixingAI])
+def test_ai_round_trips_without_its_rng(cls):
+    ai, rng = cls(rng=random.Random(1)), random.Random(2)
+    for round_no in range(60):
+        ai_move, player_move = ai.get_move(round_no), rng.choice(MOVES)
+        ai.update(player_move, determine_winner(ai_move, player_move))
+
+    blob = session_store.encode({"ai": ai, "round": 60})
+    resumed = session_store.decode(blob)["ai"]
+
+    assert len(blob) < 1500
+    assert resumed.rng is not ai.rng
+    assert resumed.n_moves == ai.n_moves
+    assert resumed.get_move(60) in MOVES